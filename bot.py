@@ -1,9 +1,11 @@
 import discord
 from discord.ext import commands
 import os
+import json
+import hashlib
 import logging
 from commands import admin, tickets, carry_system
-from utils import permissions, storage, responses
+from utils import permissions, storage, responses, async_storage, guild_config
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +19,37 @@ intents.members = True
 
 bot = commands.Bot(command_prefix='^', intents=intents)
 
+COMMAND_TREE_HASH_FILE = "data/command_tree.hash"
+
+def command_tree_hash() -> str:
+    """Hash the app-command payload that a sync would send to Discord"""
+    payload = sorted(
+        (command.to_dict(bot.tree) for command in bot.tree.get_commands()),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+async def sync_command_tree_if_changed():
+    """Sync the global command tree only when it differs from the last synced one"""
+    tree_hash = command_tree_hash()
+    stored_hash = None
+    if os.path.exists(COMMAND_TREE_HASH_FILE):
+        with open(COMMAND_TREE_HASH_FILE, 'r') as f:
+            stored_hash = f.read().strip()
+
+    if tree_hash == stored_hash:
+        logger.info("Command tree unchanged since last sync, skipping sync")
+        return
+
+    synced = await bot.tree.sync()
+    os.makedirs(os.path.dirname(COMMAND_TREE_HASH_FILE), exist_ok=True)
+    with open(COMMAND_TREE_HASH_FILE, 'w') as f:
+        f.write(tree_hash)
+
+    logger.info(f"Commands synced successfully: {len(synced)} commands")
+    for command in synced:
+        logger.info(f"Synced command: {command.name}")
+
 # Register commands
 async def setup_commands():
     try:
@@ -30,12 +63,12 @@ async def setup_commands():
         await bot.add_cog(ticket_commands)
         await bot.add_cog(carry_commands)
 
-        # Sync command tree
-        synced = await bot.tree.sync()
-        
-        logger.info(f"Commands registered and synced successfully: {len(synced)} commands")
-        for command in synced:
-            logger.info(f"Synced command: {command.name}")
+        # Sync command tree (skipped when nothing changed). A failed sync leaves
+        # the previously synced commands in place, so startup carries on
+        try:
+            await sync_command_tree_if_changed()
+        except Exception as e:
+            logger.error(f"Error syncing command tree: {e}")
         
         # Verify licence command is available
         licence_cmd = bot.tree.get_command('licence')
@@ -47,54 +80,69 @@ async def setup_commands():
         logger.error(f"Error setting up commands: {e}")
         raise  # Re-raise to ensure we catch setup failures
 
-@bot.event
-async def on_ready():
+async def setup_hook():
+    """One-shot startup work; runs before the gateway connects, never on reconnect"""
+    # Buttons are registered first and on their own: nothing registers them
+    # again until a restart, so a later startup failure must not skip them
     try:
-        logger.info(f'Bot is ready: {bot.user.name}')
+        # Ticket and carry approval buttons are dynamic items, so one handler
+        # serves every ticket and pending carry without per-item registration
+        bot.add_dynamic_items(
+            tickets.TicketCloseButton,
+            tickets.TicketPriorityButton,
+            carry_system.CarryApproveButton,
+            carry_system.CarryDeclineButton,
+            carry_system.CarryBatchApproveButton,
+            carry_system.CarryBatchDeclineButton
+        )
+        logger.info("Registered dynamic ticket and carry approval buttons")
+
+        # Register persistent views for setup menus
+        bot.add_view(admin.PersistentTicketView(bot))
+        logger.info("Registered persistent setup menu view")
+    except Exception as e:
+        logger.error(f"Error registering persistent buttons: {e}")
+
+    try:
+        await async_storage.warm_up()
         await setup_commands()
-        
-        # Register persistent views for existing tickets and setup menus
-        ticket_commands = bot.get_cog('TicketCommands')
-        admin_commands = bot.get_cog('AdminCommands')
-        
-        if ticket_commands:
-            # Add persistent views for existing ticket channels
-            for guild in bot.guilds:
-                for channel in guild.channels:
-                    if hasattr(channel, 'name') and channel.name.startswith('🎫-') and 'ticket-' in channel.name:
-                        # Extract ticket number from channel name
-                        parts = channel.name.split('-')
-                        if len(parts) >= 3:
-                            ticket_number = parts[-1]  # Last part is ticket number
-                            username = parts[1]  # Second part is username
-                            user = discord.utils.get(guild.members, name=username)
-                            if user:
-                                view = ticket_commands.TicketControls(bot, ticket_number, user)
-                                bot.add_view(view)
-                                logger.info(f"Registered persistent view for ticket {ticket_number}")
-        
-        if admin_commands:
-            # Register persistent views for setup menus
-            from commands.admin import PersistentTicketView
-            bot.add_view(PersistentTicketView(bot))
-            logger.info("Registered persistent setup menu view")
-        
-        carry_commands = bot.get_cog('CarrySystem')
-        if carry_commands:
-            # Register persistent views for carry approval buttons
-            from commands.carry_system import CarryApprovalView
-            # Load any pending carries and re-register their views
-            pending_data = carry_commands.load_pending()
-            for carry_id in pending_data.keys():
-                view = CarryApprovalView(carry_id, carry_commands)
-                bot.add_view(view)
-            logger.info(f"Registered {len(pending_data)} persistent carry approval views")
-            
     except Exception as e:
         logger.error(f"Error during startup: {e}")
         # Don't exit, let the bot continue running even if command setup fails
         # This allows for manual intervention if needed
 
+bot.setup_hook = setup_hook
+
+@bot.event
+async def on_ready():
+    # Fires again on every gateway reconnect, so it only logs
+    logger.info(f'Bot is ready: {bot.user.name}')
+
+# Resolved roles and channels are cached per guild; drop them when a configured one changes
+@bot.event
+async def on_guild_role_create(role):
+    guild_config.invalidate(role.guild.id, role)
+
+@bot.event
+async def on_guild_role_delete(role):
+    guild_config.invalidate(role.guild.id, role)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    guild_config.invalidate(after.guild.id, before, after)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    guild_config.invalidate(channel.guild.id, channel)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    guild_config.invalidate(channel.guild.id, channel)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    guild_config.invalidate(after.guild.id, before, after)
+
 # Error handling
 @bot.event
 async def on_command_error(ctx, error):
@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils import permissions, storage, responses
+from utils import permissions, storage, responses, guild_config, log_dispatcher
 import logging
 import asyncio
 from typing import Optional
@@ -29,7 +29,7 @@ class AdminCommands(commands.Cog):
             logger.error(f"Error setting up defaults: {e}")
 
     @app_commands.command(name="ticket_setup")
-    @app_commands.checks.has_any_role(1336379731330994247)
+    @permissions.has_config_role("setup_roles")
     async def ticket_setup(self, interaction: discord.Interaction, channel: discord.TextChannel):
         """Set up the ticket system in a specific channel"""
         try:
@@ -77,18 +77,16 @@ class AdminCommands(commands.Cog):
                         logger.info(f"Ticket category selected: {self.values[0]} by user: {interaction.user.name}")
 
                         # Check if user already has an open ticket
-                        for channel in interaction.guild.channels:
-                            if (channel.name.startswith('ticket-') and 
-                                str(interaction.user.id) in channel.name):
-                                await interaction.response.send_message(
-                                    embed=discord.Embed(
-                                        title="Existing Ticket",
-                                        description="Please close your previous ticket before creating a new one.",
-                                        color=discord.Color.red()
-                                    ),
-                                    ephemeral=True
-                                )
-                                return
+                        if storage.has_open_ticket(str(interaction.user.id)):
+                            await interaction.response.send_message(
+                                embed=discord.Embed(
+                                    title="Existing Ticket",
+                                    description="Please close your previous ticket before creating a new one.",
+                                    color=discord.Color.red()
+                                ),
+                                ephemeral=True
+                            )
+                            return
 
                         ticket_commands = self.bot.get_cog('TicketCommands')
                         if not ticket_commands:
@@ -143,7 +141,7 @@ class AdminCommands(commands.Cog):
             await interaction.response.send_message("An error occurred while setting up the ticket system.", ephemeral=True)
 
     @app_commands.command(name="sendmsg")
-    @app_commands.checks.has_any_role(1336379731330994247)
+    @permissions.has_config_role("setup_roles")
     async def send_message(self, interaction: discord.Interaction, channel: discord.TextChannel, message: str):
         """Send a custom message to a channel"""
         try:
@@ -218,7 +216,7 @@ class AdminCommands(commands.Cog):
         floor_or_tier="Floor (f1-f7, m1-m7, entrance) or tier (t2-t4)",
         grade="Grade achieved (s or s+)"
     )
-    @app_commands.checks.has_any_role(1274788617663025182)
+    @permissions.has_config_role("carry_submit_roles")
     async def carried(
         self,
         interaction: discord.Interaction,
@@ -240,9 +238,26 @@ class AdminCommands(commands.Cog):
             logger.error(f"Error in carried command: {e}")
             await interaction.response.send_message("An error occurred while processing the carry request.", ephemeral=True)
 
+    @app_commands.command(name="carried_bulk", description="Log many completed carries at once from a CSV file")
+    @app_commands.describe(
+        entries="CSV with one carry per line: staff, user_carried, runs, carry_type, floor_or_tier, grade"
+    )
+    @permissions.has_config_role("carry_submit_roles")
+    async def carried_bulk(self, interaction: discord.Interaction, entries: discord.Attachment):
+        """Log a batch of completed carries for approval"""
+        try:
+            carry_system = self.bot.get_cog('CarrySystem')
+            if carry_system:
+                await carry_system.carried_bulk(interaction, entries)
+            else:
+                await interaction.response.send_message("Carry system not available.", ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in carried_bulk command: {e}")
+            await interaction.response.send_message("An error occurred while processing the carry requests.", ephemeral=True)
+
     @app_commands.command(name="points", description="View total approved points for a staff member")
     @app_commands.describe(staff="The staff member to check points for")
-    @app_commands.checks.has_any_role(1280539104832127008)
+    @permissions.has_config_role("points_view_roles")
     async def points(self, interaction: discord.Interaction, staff: discord.Member):
         """View total points for a staff member"""
         try:
@@ -256,13 +271,20 @@ class AdminCommands(commands.Cog):
             await interaction.response.send_message("An error occurred while retrieving points.", ephemeral=True)
 
     @app_commands.command(name="leaderboard", description="View top staff members by carry points")
-    @app_commands.checks.has_any_role(1280539104832127008)
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.describe(period="Time period to rank by (default: all-time)")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="All-time", value="all"),
+        app_commands.Choice(name="Today", value="daily"),
+        app_commands.Choice(name="This week", value="weekly"),
+        app_commands.Choice(name="This month", value="monthly")
+    ])
+    @permissions.has_config_role("points_view_roles")
+    async def leaderboard(self, interaction: discord.Interaction, period: str = "all"):
         """Display carry points leaderboard"""
         try:
             carry_system = self.bot.get_cog('CarrySystem')
             if carry_system:
-                await carry_system.leaderboard(interaction)
+                await carry_system.leaderboard(interaction, period)
             else:
                 await interaction.response.send_message("Carry system not available.", ephemeral=True)
         except Exception as e:
@@ -270,7 +292,7 @@ class AdminCommands(commands.Cog):
             await interaction.response.send_message("An error occurred while retrieving the leaderboard.", ephemeral=True)
 
     @app_commands.command(name="pending_carries", description="View pending carry approvals")
-    @app_commands.checks.has_any_role("Manager", "Admin")
+    @permissions.has_config_role("points_admin_roles")
     async def pending_carries(self, interaction: discord.Interaction):
         """View all pending carry approvals"""
         try:
@@ -288,7 +310,7 @@ class AdminCommands(commands.Cog):
         staff="The staff member to remove points from",
         points="Number of points to remove"
     )
-    @app_commands.checks.has_any_role("Manager", "Admin")
+    @permissions.has_config_role("points_admin_roles")
     async def remove_points(self, interaction: discord.Interaction, staff: discord.Member, points: int):
         """Remove points from a staff member"""
         try:
@@ -309,7 +331,7 @@ class AdminCommands(commands.Cog):
         replacement_staff="The staff member replacing the carrier",
         points_to_deduct="Points to deduct from original carrier"
     )
-    @app_commands.checks.has_any_role("Manager", "Admin")
+    @permissions.has_config_role("points_admin_roles")
     async def add_carrier(
         self,
         interaction: discord.Interaction,
@@ -331,33 +353,24 @@ class AdminCommands(commands.Cog):
                 return
 
             # Deduct points from original carrier
-            points_data = carry_system.load_points()
             original_carrier_id = str(original_carrier.id)
-            current_points = points_data.get(original_carrier_id, 0)
-
-            if current_points == 0 and points_to_deduct > 0:
+            if carry_system.load_points().get(original_carrier_id, 0) == 0 and points_to_deduct > 0:
                 await interaction.response.send_message(f"{original_carrier.display_name} has no points to deduct.", ephemeral=True)
                 return
 
-            # Calculate new points (don't go below 0)
-            new_points = max(0, current_points - points_to_deduct)
+            # Deduct points (never below 0)
+            current_points, new_points = await carry_system.adjust_points(
+                original_carrier_id, -points_to_deduct, "replacement",
+                ticket=ticket_name, replacement_id=str(replacement_staff.id), by=str(interaction.user.id)
+            )
             actual_deducted = current_points - new_points
 
-            # Update points
-            if new_points == 0:
-                if original_carrier_id in points_data:
-                    del points_data[original_carrier_id]
-            else:
-                points_data[original_carrier_id] = new_points
-
-            carry_system.save_points(points_data)
-
             # Find and update the ticket channel
             ticket_channel = None
-            for channel in interaction.guild.channels:
-                if channel.name == ticket_name or channel.name == f"#{ticket_name}":
-                    ticket_channel = channel
-                    break
+            ticket_number = storage.parse_ticket_number(ticket_name)
+            channel_id = storage.get_ticket_channel(ticket_number) if ticket_number else None
+            if channel_id:
+                ticket_channel = interaction.guild.get_channel(int(channel_id))
             
             # Format the replacement message
             replacement_message = f"{original_carrier.mention} have been replaced by {replacement_staff.mention} in #{ticket_name}"
@@ -385,12 +398,11 @@ class AdminCommands(commands.Cog):
                     logger.error(f"Error adding permissions for {replacement_staff.name}: {e}")
 
             # Send to carrier replacement log channel
-            log_channel_id = 1401473630814081145
-            log_channel = interaction.guild.get_channel(log_channel_id)
+            log_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "replacement_log_channel")
             
             if log_channel:
                 # Send the replacement message to log channel
-                await log_channel.send(replacement_message)
+                log_dispatcher.send_log(log_channel, content=replacement_message)
                 
                 # Also send detailed embed for record keeping
                 log_embed = discord.Embed(
@@ -409,7 +421,7 @@ class AdminCommands(commands.Cog):
                 log_embed.add_field(name="New Points", value=str(new_points), inline=True)
                 log_embed.set_footer(text="Carrier Replacement System")
 
-                await log_channel.send(embed=log_embed)
+                log_dispatcher.send_log(log_channel, embed=log_embed)
 
             # Create confirmation embed
             confirmation_embed = discord.Embed(
@@ -441,8 +453,7 @@ class AdminCommands(commands.Cog):
         """Display carry points chart for specified category"""
         try:
             # Check if user has the required role
-            required_role = discord.utils.get(interaction.user.roles, id=1336379731330994247)
-            if not required_role:
+            if not guild_config.get(interaction.guild.id).has_role(interaction.user, "setup_roles"):
                 await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
                 return
 
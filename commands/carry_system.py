@@ -1,17 +1,32 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+import io
+import re
+import csv
+import time
 import logging
-from typing import Optional, Dict, Any
+import datetime
+from typing import Optional, Dict, Any, Tuple, List
+from utils.json_store import JsonStore
+from utils.points_ledger import PointsLedger
+from utils import guild_config, log_dispatcher, async_storage
+from utils.leaderboard import Leaderboard, DailyPoints
+from utils.name_resolver import NameResolver
 
 logger = logging.getLogger('discord')
 
+PERIOD_LABELS = {"daily": "Today", "weekly": "This Week", "monthly": "This Month"}
+MAX_BULK_ENTRIES = 40  # Carries per /carried_bulk file
+MAX_EMBED_DESCRIPTION = 4096  # Discord's limit; a batch is listed in one approval embed description
+MAX_BULK_FILE_BYTES = 64 * 1024
+
 class CarrySystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.points_file = "data/carry_points.json"
+        self.points_file = "data/carry_points.json"  # Legacy totals, imported into the ledger once
+        self.ledger_file = "data/carry_ledger.jsonl"
+        self.ledger_snapshot_file = "data/carry_ledger.snapshot.json"
         self.pending_file = "data/pending_carries.json"
 
         # Points matrix
@@ -41,65 +56,48 @@ class CarrySystem(commands.Cog):
             "blaze": {"t2": {"s": 10, "s+": 14}, "t3": {"s": 16, "s+": 20}, "t4": {"s": 20, "s+": 26}}
         }
 
-        # Ensure data directory exists
-        os.makedirs("data", exist_ok=True)
+        # Points are derived from an append-only ledger of point events;
+        # pending carries are a cached file written back on a debounce timer
+        self.ledger = PointsLedger(self.ledger_file, self.ledger_snapshot_file, legacy_path=self.points_file)
+        self.pending_store = JsonStore(self.pending_file)
 
-        # Initialize JSON files if they don't exist
-        self.initialize_data_files()
+        # Ranking kept in step with the points by adjust_points, and the last
+        # rendered leaderboard with the ranking version it was rendered from
+        self.ranking = Leaderboard(self.ledger.totals)
 
-    def initialize_data_files(self):
-        """Initialize JSON data files if they don't exist"""
-        try:
-            # Initialize points file
-            if not os.path.exists(self.points_file):
-                with open(self.points_file, 'w') as f:
-                    json.dump({}, f, indent=2)
-                logger.info("Created carry_points.json file")
-
-            # Initialize pending carries file
-            if not os.path.exists(self.pending_file):
-                with open(self.pending_file, 'w') as f:
-                    json.dump({}, f, indent=2)
-                logger.info("Created pending_carries.json file")
+        # Approved points per staff member per day, for period leaderboards;
+        # the ledger updates them and saves them with its snapshots
+        self.daily_points = DailyPoints()
+        self.ledger.attach("daily_points", self.daily_points)
+        self.leaderboard_embed: Optional[Tuple[int, discord.Embed]] = None
+        self.names = NameResolver(bot)
 
-        except Exception as e:
-            logger.error(f"Error initializing data files: {e}")
+    def cog_unload(self):
+        """Write any unsaved pending carries before the cog goes away"""
+        self.pending_store.flush()
 
     def load_points(self) -> Dict[str, int]:
-        """Load points data from file"""
-        try:
-            if os.path.exists(self.points_file):
-                with open(self.points_file, 'r') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading points: {e}")
-            return {}
+        """Get the current points totals (read-only; change them with adjust_points)"""
+        return self.ledger.totals
 
-    def save_points(self, points_data: Dict[str, int]):
-        """Save points data to file"""
-        try:
-            with open(self.points_file, 'w') as f:
-                json.dump(points_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving points: {e}")
+    async def adjust_points(self, staff_id: str, delta: int, event: str = "adjust", **details: Any) -> Tuple[int, int]:
+        """Record a points event adding delta (negative to remove), not going below 0.
+
+        Returns the previous and new totals.
+        """
+        previous_points, new_points = await async_storage.run(self.ledger.record, event, staff_id, delta, **details)
+        # Read the ledger's total rather than new_points, in case a later event already landed
+        self.ranking.set(staff_id, self.ledger.totals.get(staff_id, 0))
+        return previous_points, new_points
 
     def load_pending(self) -> Dict[str, Any]:
-        """Load pending carries from file"""
-        try:
-            if os.path.exists(self.pending_file):
-                with open(self.pending_file, 'r') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading pending carries: {e}")
-            return {}
+        """Get the cached pending carries"""
+        return self.pending_store.data
 
     def save_pending(self, pending_data: Dict[str, Any]):
-        """Save pending carries to file"""
+        """Save pending carries (written to file after a short delay)"""
         try:
-            with open(self.pending_file, 'w') as f:
-                json.dump(pending_data, f, indent=2)
+            self.pending_store.save(pending_data)
         except Exception as e:
             logger.error(f"Error saving pending carries: {e}")
 
@@ -178,13 +176,12 @@ class CarrySystem(commands.Cog):
                 return
 
             # Find approval channel
-            approval_channel = discord.utils.get(interaction.guild.channels, name="approve-request")
+            approval_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "approval_channel")
             if not approval_channel:
                 await interaction.response.send_message("Approval channel #approve-request not found.", ephemeral=True)
                 return
 
             # Create unique ID for this carry request
-            import time
             carry_id = str(int(time.time() * 1000))
 
             # Store pending carry
@@ -237,6 +234,163 @@ class CarrySystem(commands.Cog):
             logger.error(f"Error in carried command: {e}")
             await interaction.response.send_message("An error occurred while processing the carry request.", ephemeral=True)
 
+    def member_from_reference(self, guild: discord.Guild, reference: str) -> Optional[discord.Member]:
+        """Find a member from a mention (<@id>) or a raw user ID"""
+        match = re.fullmatch(r"<@!?(\d+)>|(\d+)", reference)
+        if not match:
+            return None
+        return guild.get_member(int(match.group(1) or match.group(2)))
+
+    def parse_bulk_entries(self, guild: discord.Guild, text: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Validate every CSV line of a bulk submission in one pass.
+
+        Returns the parsed entries and a list of per-line errors; the batch is
+        only usable when there are no errors.
+        """
+        entries = []
+        errors = []
+        for line_number, row in enumerate(csv.reader(io.StringIO(text)), 1):
+            cells = [cell.strip() for cell in row]
+            if not any(cells):
+                continue
+            if line_number == 1 and cells[0].lower() == "staff":
+                continue  # Header line
+
+            if len(cells) != 6:
+                errors.append(f"Line {line_number}: expected 6 values, got {len(cells)}")
+                continue
+            staff_ref, carried_ref, runs_text, carry_type, floor_or_tier, grade = cells
+            carry_type, floor_or_tier, grade = carry_type.lower(), floor_or_tier.lower(), grade.lower()
+
+            staff = self.member_from_reference(guild, staff_ref)
+            user_carried = self.member_from_reference(guild, carried_ref)
+            if staff is None:
+                errors.append(f"Line {line_number}: staff member '{staff_ref}' not found (use a mention or user ID)")
+            if user_carried is None:
+                errors.append(f"Line {line_number}: carried user '{carried_ref}' not found (use a mention or user ID)")
+            if not runs_text.isdigit() or int(runs_text) <= 0:
+                errors.append(f"Line {line_number}: number of runs must be a positive whole number")
+                continue
+            if carry_type not in ["dungeon", "slayer"]:
+                errors.append(f"Line {line_number}: invalid carry type '{carry_type}', use 'dungeon' or 'slayer'")
+                continue
+            if grade not in ["s", "s+"]:
+                errors.append(f"Line {line_number}: invalid grade '{grade}', use 's' or 's+'")
+                continue
+
+            points = self.calculate_points(carry_type, floor_or_tier, grade, int(runs_text))
+            if points == 0:
+                errors.append(f"Line {line_number}: invalid floor/tier '{floor_or_tier}' for {carry_type} (valid: {self.get_valid_options(carry_type)})")
+                continue
+            if staff is None or user_carried is None:
+                continue
+
+            entries.append({
+                "staff_id": str(staff.id),
+                "staff_name": staff.display_name,
+                "user_carried_id": str(user_carried.id),
+                "user_carried_name": user_carried.display_name,
+                "runs": int(runs_text),
+                "carry_type": carry_type,
+                "floor_or_tier": floor_or_tier,
+                "grade": grade,
+                "points": points
+            })
+
+        if len(entries) > MAX_BULK_ENTRIES:
+            errors.append(f"Too many carries: {len(entries)} (at most {MAX_BULK_ENTRIES} per file)")
+        elif not entries and not errors:
+            errors.append("The file does not contain any carries")
+        elif not errors and len(self.bulk_description(entries)) > MAX_EMBED_DESCRIPTION:
+            errors.append("The batch is too long to list in one approval message; split it into smaller files")
+        return entries, errors
+
+    def bulk_description(self, entries: List[Dict[str, Any]]) -> str:
+        """List a batch's carries, one line each, for the approval embed"""
+        return "\n".join(
+            f"**{number}.** <@{entry['staff_id']}> carried <@{entry['user_carried_id']}> - "
+            f"{entry['carry_type'].title()} {entry['floor_or_tier'].upper()} {entry['grade'].upper()} "
+            f"x{entry['runs']} = **{entry['points']}**"
+            for number, entry in enumerate(entries, 1)
+        )
+
+    async def carried_bulk(self, interaction: discord.Interaction, attachment: discord.Attachment):
+        """Log a CSV file of completed carries as one batch for approval"""
+        try:
+            if attachment.size > MAX_BULK_FILE_BYTES:
+                await interaction.response.send_message("That file is too large for a carry batch.", ephemeral=True)
+                return
+
+            try:
+                text = (await attachment.read()).decode("utf-8-sig")
+            except UnicodeDecodeError:
+                await interaction.response.send_message("The file must be a UTF-8 text/CSV file.", ephemeral=True)
+                return
+
+            entries, errors = self.parse_bulk_entries(interaction.guild, text)
+            if errors:
+                shown = "\n".join(errors[:15])
+                more = f"\n...and {len(errors) - 15} more" if len(errors) > 15 else ""
+                await interaction.response.send_message(
+                    f"No carries were submitted. Fix these lines and try again:\n{shown}{more}",
+                    ephemeral=True
+                )
+                return
+
+            # Find approval channel
+            approval_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "approval_channel")
+            if not approval_channel:
+                await interaction.response.send_message("Approval channel #approve-request not found.", ephemeral=True)
+                return
+
+            # Store every carry of the batch with a single pending save
+            batch_id = str(int(time.time() * 1000))
+            pending_data = self.load_pending()
+            submitted_at = time.time()
+            carry_ids = []
+            for number, entry in enumerate(entries, 1):
+                carry_ids.append(f"{batch_id}-{number}")
+                pending_data[carry_ids[-1]] = {
+                    **entry,
+                    "requester_id": str(interaction.user.id),
+                    "requester_name": interaction.user.display_name,
+                    "batch_id": batch_id,
+                    "timestamp": submitted_at
+                }
+            self.save_pending(pending_data)
+
+            total_points = sum(entry["points"] for entry in entries)
+            embed = discord.Embed(
+                title="🎯 Bulk Carry Approval Request",
+                description=self.bulk_description(entries),
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Requested by", value=interaction.user.mention, inline=True)
+            embed.add_field(name="Carries", value=str(len(entries)), inline=True)
+            embed.add_field(name="Total Points", value=str(total_points), inline=True)
+            embed.set_footer(text=f"Batch ID: {batch_id}")
+
+            try:
+                await approval_channel.send(embed=embed, view=CarryBatchView(batch_id, self))
+            except Exception:
+                # Without its approval message the batch could never be approved
+                pending_data = self.load_pending()
+                for carry_id in carry_ids:
+                    pending_data.pop(carry_id, None)
+                self.save_pending(pending_data)
+                raise
+
+            await interaction.response.send_message(
+                f"{len(entries)} carry requests submitted for approval as one batch. Points to be awarded: {total_points}",
+                ephemeral=True
+            )
+
+            logger.info(f"Carry batch {batch_id} submitted by {interaction.user.name}: {len(entries)} carries, {total_points} points")
+
+        except Exception as e:
+            logger.error(f"Error in carried_bulk command: {e}")
+            await interaction.response.send_message("An error occurred while processing the carry requests.", ephemeral=True)
+
     async def points(self, interaction: discord.Interaction, staff: discord.Member):
         """View total points for a staff member"""
         try:
@@ -248,6 +402,9 @@ class CarrySystem(commands.Cog):
                 description=f"{staff.mention} has **{total_points}** total approved points.",
                 color=discord.Color.blue()
             )
+            rank = self.ranking.rank(str(staff.id))
+            if rank:
+                embed.add_field(name="Rank", value=f"#{rank} of {len(self.ranking)}", inline=True)
             
             # Handle avatar URL safely
             try:
@@ -261,54 +418,70 @@ class CarrySystem(commands.Cog):
             logger.error(f"Error in points command: {e}")
             await interaction.response.send_message("An error occurred while retrieving points.", ephemeral=True)
 
-    async def leaderboard(self, interaction: discord.Interaction):
-        """Display carry points leaderboard"""
+    def period_start(self, period: str) -> datetime.date:
+        """First UTC day of the current daily, weekly (from Monday) or monthly period"""
+        today = datetime.datetime.utcnow().date()
+        if period == "daily":
+            return today
+        if period == "weekly":
+            return today - datetime.timedelta(days=today.weekday())
+        return today.replace(day=1)
+
+    async def leaderboard(self, interaction: discord.Interaction, period: str = "all"):
+        """Display carry points leaderboard, all-time or for the current day/week/month"""
         try:
-            points_data = self.load_points()
+            if period != "all":
+                today = datetime.datetime.utcnow().date()
+                start = self.period_start(period)
+                top = self.daily_points.top(start, today, 10)
+                if not top:
+                    await interaction.response.send_message(f"No carry points approved {PERIOD_LABELS[period].lower()}.", ephemeral=True)
+                    return
+                embed = await self.render_leaderboard(top, f"🏆 Carry Points Leaderboard - {PERIOD_LABELS[period]}")
+                embed.set_footer(text=f"Approved points since {start.isoformat()} (UTC)")
+                await interaction.response.send_message(embed=embed)
+                return
 
-            if not points_data:
+            if not len(self.ranking):
                 await interaction.response.send_message("No carry points recorded yet.", ephemeral=True)
                 return
 
-            # Sort by points (descending)
-            sorted_points = sorted(points_data.items(), key=lambda x: x[1], reverse=True)
+            # Re-render only when the ranking changed since the cached embed
+            if self.leaderboard_embed is None or self.leaderboard_embed[0] != self.ranking.version:
+                version = self.ranking.version
+                self.leaderboard_embed = (version, await self.render_leaderboard(self.ranking.top(10)))
 
-            embed = discord.Embed(
-                title="🏆 Carry Points Leaderboard",
-                color=discord.Color.gold()
-            )
+            await interaction.response.send_message(embed=self.leaderboard_embed[1])
 
-            leaderboard_text = ""
-            for i, (user_id, points) in enumerate(sorted_points[:10], 1):
-                try:
-                    user = self.bot.get_user(int(user_id))
-                    if user:
-                        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                        leaderboard_text += f"{medal} {user.display_name}: **{points}** points\n"
-                    else:
-                        # Try to fetch user from Discord API if not in cache
-                        try:
-                            user = await self.bot.fetch_user(int(user_id))
-                            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                            leaderboard_text += f"{medal} {user.display_name}: **{points}** points\n"
-                        except:
-                            # User not found, show with ID only
-                            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                            leaderboard_text += f"{medal} Unknown User ({user_id}): **{points}** points\n"
-                except Exception as e:
-                    logger.error(f"Error processing user {user_id} in leaderboard: {e}")
-                    continue
+        except Exception as e:
+            logger.error(f"Error in leaderboard command: {e}")
+            await interaction.response.send_message("An error occurred while retrieving the leaderboard.", ephemeral=True)
 
-            if leaderboard_text:
-                embed.description = leaderboard_text
+    async def render_leaderboard(self, top: List[Tuple[str, int]], title: str = "🏆 Carry Points Leaderboard") -> discord.Embed:
+        """Build a leaderboard embed from ranked (user_id, points) pairs"""
+        embed = discord.Embed(
+            title=title,
+            color=discord.Color.gold()
+        )
+
+        names = await self.names.resolve_many(int(user_id) for user_id, _ in top)
+
+        leaderboard_text = ""
+        for i, (user_id, points) in enumerate(top, 1):
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            name = names.get(int(user_id))
+            if name:
+                leaderboard_text += f"{medal} {name}: **{points}** points\n"
             else:
-                embed.description = "No valid entries found."
+                # User not found, show with ID only
+                leaderboard_text += f"{medal} Unknown User ({user_id}): **{points}** points\n"
 
-            await interaction.response.send_message(embed=embed)
+        if leaderboard_text:
+            embed.description = leaderboard_text
+        else:
+            embed.description = "No valid entries found."
 
-        except Exception as e:
-            logger.error(f"Error in leaderboard command: {e}")
-            await interaction.response.send_message("An error occurred while retrieving the leaderboard.", ephemeral=True)
+        return embed
 
     async def pending_carries(self, interaction: discord.Interaction):
         """View all pending carry approvals"""
@@ -324,16 +497,19 @@ class CarrySystem(commands.Cog):
                 color=discord.Color.orange()
             )
 
+            shown = list(pending_data.items())[:10]  # Show max 10
+            user_ids = [int(data["staff_id"]) for _, data in shown]
+            user_ids += [int(data["user_carried_id"]) for _, data in shown if "user_carried_id" in data]
+            names = await self.names.resolve_many(user_ids)
+
             pending_text = ""
-            for carry_id, data in list(pending_data.items())[:10]:  # Show max 10
-                staff_user = self.bot.get_user(int(data["staff_id"]))
-                staff_name = staff_user.display_name if staff_user else data["staff_name"]
+            for carry_id, data in shown:
+                staff_name = names.get(int(data["staff_id"])) or data["staff_name"]
                 
                 # Handle user_carried (for backward compatibility with old entries)
                 user_carried_name = "Unknown"
                 if "user_carried_id" in data:
-                    user_carried_user = self.bot.get_user(int(data["user_carried_id"]))
-                    user_carried_name = user_carried_user.display_name if user_carried_user else data.get("user_carried_name", "Unknown")
+                    user_carried_name = names.get(int(data["user_carried_id"])) or data.get("user_carried_name", "Unknown")
                 
                 pending_text += (
                     f"**ID:** {carry_id}\n"
@@ -358,28 +534,15 @@ class CarrySystem(commands.Cog):
                 await interaction.response.send_message("Points to remove must be positive.", ephemeral=True)
                 return
 
-            points_data = self.load_points()
             staff_id = str(staff.id)
-            current_points = points_data.get(staff_id, 0)
-
-            if current_points == 0:
+            if self.load_points().get(staff_id, 0) == 0:
                 await interaction.response.send_message(f"{staff.display_name} has no points to remove.", ephemeral=True)
                 return
 
-            # Calculate new points (don't go below 0)
-            new_points = max(0, current_points - points)
+            # Remove points (never below 0)
+            current_points, new_points = await self.adjust_points(staff_id, -points, "remove", by=str(interaction.user.id))
             points_removed = current_points - new_points
 
-            # Update points
-            if new_points == 0:
-                # Remove entry if points reach 0
-                if staff_id in points_data:
-                    del points_data[staff_id]
-            else:
-                points_data[staff_id] = new_points
-
-            self.save_points(points_data)
-
             # Create confirmation embed
             embed = discord.Embed(
                 title="📉 Points Removed",
@@ -407,11 +570,11 @@ class CarrySystem(commands.Cog):
             logger.error(f"Error in remove_points command: {e}")
             await interaction.response.send_message("An error occurred while removing points.", ephemeral=True)
 
-    async def send_points_log(self, interaction: discord.Interaction, carry_data: dict, previous_points: int, new_points: int, action: str):
+    async def send_points_log(self, interaction: discord.Interaction, carry_data: dict, previous_points: int, new_points: int, action: str, carry_id: str):
         """Send points change log to the main points log channel"""
         try:
             # Get the points log channel
-            points_channel = interaction.guild.get_channel(1401461191028637717)
+            points_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "points_log_channel")
             if not points_channel:
                 logger.error("Points log channel not found")
                 return
@@ -434,9 +597,9 @@ class CarrySystem(commands.Cog):
             embed.add_field(name="Previous Points", value=str(previous_points), inline=True)
             embed.add_field(name="New Points", value=str(new_points), inline=True)
             embed.add_field(name="Carry Details", value=f"{carry_data['carry_type'].title()} {carry_data['floor_or_tier'].upper()} - {carry_data['grade'].upper()} ({carry_data['runs']} runs)", inline=False)
-            embed.set_footer(text=f"Request ID: {self.carry_id}")
+            embed.set_footer(text=f"Request ID: {carry_id}")
 
-            await points_channel.send(embed=embed)
+            log_dispatcher.send_log(points_channel, embed=embed)
 
         except Exception as e:
             logger.error(f"Error sending points log: {e}")
@@ -445,7 +608,7 @@ class CarrySystem(commands.Cog):
         """Send points removal log to the main points log channel"""
         try:
             # Get the points log channel
-            points_channel = interaction.guild.get_channel(1401461191028637717)
+            points_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "points_log_channel")
             if not points_channel:
                 logger.error("Points log channel not found")
                 return
@@ -465,30 +628,29 @@ class CarrySystem(commands.Cog):
             embed.add_field(name="New Points", value=str(new_points), inline=True)
             embed.set_footer(text="Manual points removal")
 
-            await points_channel.send(embed=embed)
+            log_dispatcher.send_log(points_channel, embed=embed)
 
         except Exception as e:
             logger.error(f"Error sending points removal log: {e}")
 
 class CarryApprovalView(discord.ui.View):
     def __init__(self, carry_id: str, carry_system: CarrySystem):
-        super().__init__(timeout=None)
+        super().__init__(timeout=None)  # Buttons are served by the dynamic item handlers below
         self.carry_id = carry_id
         self.carry_system = carry_system
 
-    @discord.ui.button(label="Approve", style=discord.ButtonStyle.green, emoji="✅", custom_id="approve_carry")
-    async def approve_carry(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_approval(interaction, True)
+        self.add_item(CarryApproveButton(carry_id))
+        self.add_item(CarryDeclineButton(carry_id))
 
-    @discord.ui.button(label="Decline", style=discord.ButtonStyle.red, emoji="❌", custom_id="decline_carry")
-    async def decline_carry(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_approval(interaction, False)
+    def disable_buttons(self):
+        """Disable the approve/decline buttons"""
+        for item in self.children:
+            getattr(item, 'item', item).disabled = True
 
     async def handle_approval(self, interaction: discord.Interaction, approved: bool):
         try:
-            # Check if user has Manager role (using role ID)
-            manager_role = discord.utils.get(interaction.user.roles, id=1274788617663025182)
-            if not manager_role:
+            # Check if user has a carry approver role
+            if not guild_config.get(interaction.guild.id).has_role(interaction.user, "carry_approver_roles"):
                 await interaction.response.send_message("Only Managers can approve or decline carry requests.", ephemeral=True)
                 return
 
@@ -506,16 +668,18 @@ class CarryApprovalView(discord.ui.View):
                 return
 
             if approved:
+                # Remove from pending before crediting, so a second click finds nothing to approve
+                pending_data.pop(self.carry_id, None)
+                self.carry_system.save_pending(pending_data)
+
                 # Add points to staff member
-                points_data = self.carry_system.load_points()
-                staff_id = carry_data["staff_id"]
-                current_points = points_data.get(staff_id, 0)
-                new_points = current_points + carry_data["points"]
-                points_data[staff_id] = new_points
-                self.carry_system.save_points(points_data)
+                current_points, new_points = await self.carry_system.adjust_points(
+                    carry_data["staff_id"], carry_data["points"], "approve",
+                    carry_id=self.carry_id, by=str(interaction.user.id)
+                )
 
                 # Send general points log
-                await self.send_points_log(interaction, carry_data, current_points, new_points, "added")
+                await self.carry_system.send_points_log(interaction, carry_data, current_points, new_points, "added", self.carry_id)
 
                 # Send approved log to channel
                 await self.send_approved_log(interaction, carry_data)
@@ -543,7 +707,16 @@ class CarryApprovalView(discord.ui.View):
 
                     async def on_submit(self, modal_interaction: discord.Interaction):
                         reason = self.reason_input.value
-                        
+                        carry_id = self.carry_approval_view.carry_id
+                        carry_system = self.carry_approval_view.carry_system
+
+                        # Remove from pending, unless it was approved or declined while this modal was open
+                        pending_data = carry_system.load_pending()
+                        if pending_data.pop(carry_id, None) is None:
+                            await modal_interaction.response.send_message("This carry request is no longer pending.", ephemeral=True)
+                            return
+                        carry_system.save_pending(pending_data)
+
                         # Send declined log to channel
                         await self.carry_approval_view.send_declined_log(modal_interaction, carry_data, reason)
                         
@@ -554,29 +727,19 @@ class CarryApprovalView(discord.ui.View):
                         embed.add_field(name="Reason", value=reason, inline=False)
                         
                         # Disable buttons
-                        for item in self.carry_approval_view.children:
-                            item.disabled = True
-                        
-                        # Remove from pending
-                        del pending_data[self.carry_id]
-                        self.carry_approval_view.carry_system.save_pending(pending_data)
+                        self.carry_approval_view.disable_buttons()
                         
                         await interaction.edit_original_response(embed=embed, view=self.carry_approval_view)
                         await modal_interaction.response.send_message("Carry request declined and logged.", ephemeral=True)
                         
-                        logger.info(f"Carry request {self.carry_id} declined by {modal_interaction.user.name} - Reason: {reason}")
+                        logger.info(f"Carry request {carry_id} declined by {modal_interaction.user.name} - Reason: {reason}")
 
                 modal = DeclineReasonModal(self)
                 await interaction.response.send_modal(modal)
                 return
 
             # Disable buttons for approved requests
-            for item in self.children:
-                item.disabled = True
-
-            # Remove from pending for approved requests
-            del pending_data[self.carry_id]
-            self.carry_system.save_pending(pending_data)
+            self.disable_buttons()
 
             await interaction.response.edit_message(embed=embed, view=self)
 
@@ -593,7 +756,7 @@ class CarryApprovalView(discord.ui.View):
         """Send approved carry log to the approved channel"""
         try:
             # Get the approved log channel
-            approved_channel = interaction.guild.get_channel(1401461706764451890)
+            approved_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "approved_log_channel")
             if not approved_channel:
                 logger.error("Approved log channel not found")
                 return
@@ -622,7 +785,7 @@ class CarryApprovalView(discord.ui.View):
             embed.add_field(name="Points Awarded", value=str(carry_data["points"]), inline=True)
             embed.set_footer(text=f"Request ID: {self.carry_id}")
 
-            await approved_channel.send(embed=embed)
+            log_dispatcher.send_log(approved_channel, embed=embed)
 
         except Exception as e:
             logger.error(f"Error sending approved log: {e}")
@@ -631,7 +794,7 @@ class CarryApprovalView(discord.ui.View):
         """Send declined carry log to the declined channel"""
         try:
             # Get the declined log channel
-            declined_channel = interaction.guild.get_channel(1401461442145681519)
+            declined_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "declined_log_channel")
             if not declined_channel:
                 logger.error("Declined log channel not found")
                 return
@@ -661,10 +824,233 @@ class CarryApprovalView(discord.ui.View):
             embed.add_field(name="Decline Reason", value=reason, inline=False)
             embed.set_footer(text=f"Request ID: {self.carry_id}")
 
-            await declined_channel.send(embed=embed)
+            log_dispatcher.send_log(declined_channel, embed=embed)
 
         except Exception as e:
             logger.error(f"Error sending declined log: {e}")
 
+# Approval buttons are dynamic items: the custom ID carries the carry ID, so one
+# stateless handler serves every pending carry. Messages posted before carry IDs
+# were encoded use the bare legacy custom ID; for those the carry ID is read
+# from the "Request ID" footer of the approval embed.
+
+def carry_id_from_message(message: Optional[discord.Message]) -> Optional[str]:
+    try:
+        footer = message.embeds[0].footer.text or ""
+        if footer.startswith("Request ID: "):
+            return footer[len("Request ID: "):]
+    except (AttributeError, IndexError):
+        pass
+    return None
+
+async def handle_carry_button(interaction: discord.Interaction, carry_id: Optional[str], approved: bool):
+    carry_system = interaction.client.get_cog('CarrySystem')
+    if not carry_system or not carry_id:
+        await interaction.response.send_message("This carry request is no longer valid.", ephemeral=True)
+        return
+    await CarryApprovalView(carry_id, carry_system).handle_approval(interaction, approved)
+
+class CarryApproveButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?:carry:approve:(?P<carry_id>[0-9]+)|approve_carry)'):
+    def __init__(self, carry_id: Optional[str]):
+        super().__init__(discord.ui.Button(
+            label="Approve",
+            style=discord.ButtonStyle.green,
+            emoji="✅",
+            custom_id=f"carry:approve:{carry_id}"
+        ))
+        self.carry_id = carry_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['carry_id'] or carry_id_from_message(interaction.message))
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_carry_button(interaction, self.carry_id, True)
+
+class CarryDeclineButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?:carry:decline:(?P<carry_id>[0-9]+)|decline_carry)'):
+    def __init__(self, carry_id: Optional[str]):
+        super().__init__(discord.ui.Button(
+            label="Decline",
+            style=discord.ButtonStyle.red,
+            emoji="❌",
+            custom_id=f"carry:decline:{carry_id}"
+        ))
+        self.carry_id = carry_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['carry_id'] or carry_id_from_message(interaction.message))
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_carry_button(interaction, self.carry_id, False)
+
+class CarryBatchView(discord.ui.View):
+    """Approve or decline every carry of a /carried_bulk batch at once"""
+
+    def __init__(self, batch_id: str, carry_system: CarrySystem):
+        super().__init__(timeout=None)  # Buttons are served by the dynamic item handlers below
+        self.batch_id = batch_id
+        self.carry_system = carry_system
+
+        self.add_item(CarryBatchApproveButton(batch_id))
+        self.add_item(CarryBatchDeclineButton(batch_id))
+
+    def disable_buttons(self):
+        """Disable the approve/decline buttons"""
+        for item in self.children:
+            getattr(item, 'item', item).disabled = True
+
+    def batch_carries(self) -> Dict[str, Dict[str, Any]]:
+        """The batch's carries that are still pending, by carry ID"""
+        return {
+            carry_id: carry_data
+            for carry_id, carry_data in self.carry_system.load_pending().items()
+            if carry_data.get("batch_id") == self.batch_id
+        }
+
+    async def handle_approval(self, interaction: discord.Interaction, approved: bool):
+        try:
+            # Check if user has a carry approver role
+            if not guild_config.get(interaction.guild.id).has_role(interaction.user, "carry_approver_roles"):
+                await interaction.response.send_message("Only Managers can approve or decline carry requests.", ephemeral=True)
+                return
+
+            carries = self.batch_carries()
+            if not carries:
+                await interaction.response.send_message("This carry batch is no longer valid.", ephemeral=True)
+                return
+
+            # Check if manager is trying to approve their own carries
+            if any(carry_data["staff_id"] == str(interaction.user.id) for carry_data in carries.values()):
+                await interaction.response.send_message("You cannot approve a batch that contains your own carries.", ephemeral=True)
+                return
+
+            if not approved:
+                await interaction.response.send_modal(BatchDeclineReasonModal(self, interaction))
+                return
+
+            # Crediting a large batch can take longer than the interaction allows
+            await interaction.response.defer()
+
+            total_points = 0
+            approved_count = 0
+            for carry_id, carry_data in carries.items():
+                # Remove each carry from pending before crediting it, so a failure
+                # part way through or a second click never credits it twice
+                pending_data = self.carry_system.load_pending()
+                if pending_data.pop(carry_id, None) is None:
+                    continue
+                self.carry_system.save_pending(pending_data)
+
+                current_points, new_points = await self.carry_system.adjust_points(
+                    carry_data["staff_id"], carry_data["points"], "approve",
+                    carry_id=carry_id, batch_id=self.batch_id, by=str(interaction.user.id)
+                )
+                total_points += carry_data["points"]
+                approved_count += 1
+                await self.carry_system.send_points_log(interaction, carry_data, current_points, new_points, "added", carry_id)
+                await CarryApprovalView(carry_id, self.carry_system).send_approved_log(interaction, carry_data)
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.green()
+            embed.add_field(name="Status", value=f"✅ Approved by {interaction.user.mention}", inline=False)
+            self.disable_buttons()
+            await interaction.edit_original_response(embed=embed, view=self)
+            await interaction.followup.send(f"Carry batch approved! {total_points} points added across {approved_count} carries.", ephemeral=True)
+
+            logger.info(f"Carry batch {self.batch_id} ({approved_count} carries) approved by {interaction.user.name}")
+
+        except Exception as e:
+            logger.error(f"Error handling batch approval: {e}")
+            if interaction.response.is_done():
+                await interaction.followup.send("An error occurred while processing the approval.", ephemeral=True)
+            else:
+                await interaction.response.send_message("An error occurred while processing the approval.", ephemeral=True)
+
+class BatchDeclineReasonModal(discord.ui.Modal):
+    def __init__(self, batch_view: CarryBatchView, button_interaction: discord.Interaction):
+        super().__init__(title="Decline Reason")
+        self.batch_view = batch_view
+        self.button_interaction = button_interaction
+
+        self.reason_input = discord.ui.TextInput(
+            label="Why are you declining these carries?",
+            style=discord.TextStyle.paragraph,
+            placeholder="Enter the reason for declining...",
+            required=True,
+            max_length=500
+        )
+        self.add_item(self.reason_input)
+
+    async def on_submit(self, modal_interaction: discord.Interaction):
+        reason = self.reason_input.value
+        carry_system = self.batch_view.carry_system
+        carries = self.batch_view.batch_carries()
+        if not carries:
+            # Approved or declined by someone else while this modal was open
+            await modal_interaction.response.send_message("This carry batch is no longer pending.", ephemeral=True)
+            return
+
+        # Remove the whole batch from pending with one save
+        pending_data = carry_system.load_pending()
+        for carry_id in carries:
+            pending_data.pop(carry_id, None)
+        carry_system.save_pending(pending_data)
+
+        for carry_id, carry_data in carries.items():
+            await CarryApprovalView(carry_id, carry_system).send_declined_log(modal_interaction, carry_data, reason)
+
+        embed = self.button_interaction.message.embeds[0]
+        embed.color = discord.Color.red()
+        embed.add_field(name="Status", value=f"❌ Declined by {modal_interaction.user.mention}", inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        self.batch_view.disable_buttons()
+
+        await self.button_interaction.edit_original_response(embed=embed, view=self.batch_view)
+        await modal_interaction.response.send_message("Carry batch declined and logged.", ephemeral=True)
+
+        logger.info(f"Carry batch {self.batch_view.batch_id} declined by {modal_interaction.user.name} - Reason: {reason}")
+
+async def handle_batch_button(interaction: discord.Interaction, batch_id: str, approved: bool):
+    carry_system = interaction.client.get_cog('CarrySystem')
+    if not carry_system:
+        await interaction.response.send_message("This carry batch is no longer valid.", ephemeral=True)
+        return
+    await CarryBatchView(batch_id, carry_system).handle_approval(interaction, approved)
+
+class CarryBatchApproveButton(discord.ui.DynamicItem[discord.ui.Button], template=r'carry:batch_approve:(?P<batch_id>[0-9]+)'):
+    def __init__(self, batch_id: str):
+        super().__init__(discord.ui.Button(
+            label="Approve All",
+            style=discord.ButtonStyle.green,
+            emoji="✅",
+            custom_id=f"carry:batch_approve:{batch_id}"
+        ))
+        self.batch_id = batch_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['batch_id'])
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_batch_button(interaction, self.batch_id, True)
+
+class CarryBatchDeclineButton(discord.ui.DynamicItem[discord.ui.Button], template=r'carry:batch_decline:(?P<batch_id>[0-9]+)'):
+    def __init__(self, batch_id: str):
+        super().__init__(discord.ui.Button(
+            label="Decline All",
+            style=discord.ButtonStyle.red,
+            emoji="❌",
+            custom_id=f"carry:batch_decline:{batch_id}"
+        ))
+        self.batch_id = batch_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['batch_id'])
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_batch_button(interaction, self.batch_id, False)
+
 async def setup(bot):
     await bot.add_cog(CarrySystem(bot))
\ No newline at end of file
@@ -1,13 +1,29 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils import permissions, storage, responses
+from utils import permissions, storage, responses, async_storage, transcript_buffer, transcript_archive, guild_config, channel_pool, category_shards, rename_scheduler, log_dispatcher
 import logging
 import asyncio
-from typing import Optional
+import io
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple, Set
 
 logger = logging.getLogger('discord')
 
+TICKET_LOCK_STRIPES = 64  # Ticket creation locks, shared by user id modulo this count
+MAX_HANDLED_INTERACTIONS = 1024  # Recent ticket-creating interaction ids remembered for deduplication
+
+def format_transcript_line(message: discord.Message, change: Optional[str] = None) -> str:
+    """Format a single message as a transcript line, optionally tagged as edited/deleted"""
+    if change:
+        timestamp = discord.utils.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        return f"[{timestamp}] {message.author.display_name} ({change}): {message.content or '[Embed/File]'}\n"
+    timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    content = message.content or "[Embed/File]"
+    return f"[{timestamp}] {message.author.display_name}: {content}\n"
+
 class DungeonCarryForm(discord.ui.Modal):
     def __init__(self, bot):
         super().__init__(title="🏰 Dungeon Carry Request")
@@ -195,7 +211,7 @@ class PrioritySelectView(discord.ui.View):
     async def set_priority(self, interaction: discord.Interaction, priority: str, emoji: str):
         try:
             # Check if priority has already been set for this ticket
-            existing_priority = storage.get_ticket_priority(self.ticket_number)
+            existing_priority = await async_storage.get_ticket_priority(self.ticket_number)
             if existing_priority:
                 await interaction.response.send_message(
                     f"Priority has already been set for this ticket to **{existing_priority}**. Priority can only be selected once per ticket.",
@@ -210,7 +226,7 @@ class PrioritySelectView(discord.ui.View):
             )
 
             # Store the priority
-            storage.set_ticket_priority(self.ticket_number, priority)
+            await async_storage.set_ticket_priority(self.ticket_number, priority)
             
             # Disable all priority buttons after selection
             for item in self.children:
@@ -234,25 +250,22 @@ class PrioritySelectView(discord.ui.View):
             
             # Send to the ticket channel
             ticket_channel = None
-            for channel in interaction.guild.channels:
-                if channel.name == f"ticket-{self.ticket_number}" or channel.name.endswith(f"ticket-{self.ticket_number}"):
-                    ticket_channel = channel
-                    break
+            channel_id = storage.get_ticket_channel(self.ticket_number)
+            if channel_id:
+                ticket_channel = interaction.guild.get_channel(int(channel_id))
             
             if ticket_channel:
                 await ticket_channel.send(embed=priority_embed)
                 
-                # Update ticket channel name with priority color
-                new_channel_name = f"{emoji}ticket-{self.ticket_number}"
-                try:
-                    await ticket_channel.edit(name=new_channel_name)
-                except Exception as e:
-                    logger.error(f"Error updating channel name: {e}")
+                # Update ticket channel name with priority color (applied in the
+                # background within Discord's rename limit)
+                rename_scheduler.request_rename(ticket_channel, f"{emoji}ticket-{self.ticket_number}")
             
             # Send notification to priority history channel
             try:
                 # Look for existing priority history channel
-                priority_channel = discord.utils.get(interaction.guild.channels, name="priority-history")
+                config = guild_config.get(interaction.guild.id)
+                priority_channel = config.channel(interaction.guild, "priority_history_channel")
                 
                 # Create the channel if it doesn't exist
                 if not priority_channel:
@@ -268,8 +281,8 @@ class PrioritySelectView(discord.ui.View):
                 # Send notification if channel exists or was created
                 if priority_channel:
                     # Get the Carriers role
-                    carriers_role = discord.utils.get(interaction.guild.roles, id=1280539104832127008)
-                    carriers_mention = f"<@&1280539104832127008>" if carriers_role else "@Carriers"
+                    carriers_role = config.role(interaction.guild, "carriers_role")
+                    carriers_mention = carriers_role.mention if carriers_role else "@Carriers"
                     
                     # Create priority-specific message
                     if priority.lower() == "urgent":
@@ -279,7 +292,7 @@ class PrioritySelectView(discord.ui.View):
                     else:
                         priority_message = f"{carriers_mention} {interaction.user.mention} has set ticket-{self.ticket_number} priority to **{priority}** {emoji}."
                     
-                    await priority_channel.send(priority_message)
+                    log_dispatcher.send_log(priority_channel, content=priority_message)
                     
             except Exception as e:
                 logger.error(f"Error sending priority notification: {e}")
@@ -361,7 +374,7 @@ class FeedbackModal(discord.ui.Modal):
                 return
 
             # Store the feedback
-            stored = storage.store_feedback(
+            stored = await async_storage.store_feedback(
                 ticket_name=ticket_number,
                 user_id=str(interaction.user.id),
                 rating=rating_value,
@@ -373,7 +386,7 @@ class FeedbackModal(discord.ui.Modal):
                 await interaction.response.send_message("Failed to store feedback.", ephemeral=True)
                 return
 
-            claimed_by = storage.get_ticket_claimed_by(ticket_number) or "Unclaimed"
+            claimed_by = await async_storage.get_ticket_claimed_by(ticket_number) or "Unclaimed"
             closed_by = interaction.user.name
 
             # Create and send feedback embed
@@ -388,13 +401,12 @@ class FeedbackModal(discord.ui.Modal):
             )
 
             # Send to feedback log channel
-            feedback_channel_id = 1401276435439554580  # Feedback channel ID
             try:
-                feedback_log_channel = guild.get_channel(feedback_channel_id)
+                feedback_log_channel = guild_config.get(guild.id).channel(guild, "feedback_channel")
                 if feedback_log_channel:
-                    await feedback_log_channel.send(embed=feedback_embed)
+                    log_dispatcher.send_log(feedback_log_channel, embed=feedback_embed)
                 else:
-                    logger.error(f"Feedback channel {feedback_channel_id} not found")
+                    logger.error(f"Feedback channel for guild {guild.id} not found")
             except Exception as e:
                 logger.error(f"Could not send feedback to channel: {e}")
 
@@ -466,6 +478,7 @@ class CloseReasonModal(discord.ui.Modal):
 
                 # Create transcript with reason
                 await controls.create_and_send_transcript(interaction, f"Closed by staff - Reason: {self.reason.value}")
+                await controls.record_closure()
 
                 # Delete the channel after transcript is sent
                 await asyncio.sleep(5)
@@ -479,20 +492,21 @@ class CloseReasonModal(discord.ui.Modal):
             )
 
 class FeedbackButton(discord.ui.Button):
-    def __init__(self, ticket_number: str):
+    def __init__(self, ticket_number: str, guild_id: int):
         super().__init__(
             style=discord.ButtonStyle.green,
             label="✨ Rate & Give Feedback",
             custom_id=f"feedback_{ticket_number}"
         )
         self.ticket_number = ticket_number
+        self.guild_id = guild_id  # Feedback is given from DMs, so remember the ticket's guild
 
     async def callback(self, interaction: discord.Interaction):
         try:
             logger.info(f"[DEBUG] Opening feedback modal for ticket {self.ticket_number}")
 
             # Check if feedback already exists
-            existing_feedback = storage.get_feedback(self.ticket_number)
+            existing_feedback = await async_storage.get_feedback(self.ticket_number)
             if existing_feedback:
                 await interaction.response.send_message(
                     embed=discord.Embed(
@@ -504,11 +518,9 @@ class FeedbackButton(discord.ui.Button):
                 )
                 return
 
-            # Use the guild ID for FakePixel Giveaways
-            guild_id = 1246452712653062175
             modal = FeedbackModal(
                 ticket_name=self.ticket_number,
-                guild_id=guild_id
+                guild_id=self.guild_id
             )
             await interaction.response.send_modal(modal)
             logger.info(f"[DEBUG] Opened feedback modal for ticket {self.ticket_number}")
@@ -528,8 +540,21 @@ class TicketCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.active_categories = ['Dungeon Carry', 'Slayer Carry']
+        self.category_shards = category_shards.TicketCategoryShards()
+        self.channel_pool = channel_pool.TicketChannelPool(self.category_shards)
+        self.creation_locks = [asyncio.Lock() for _ in range(TICKET_LOCK_STRIPES)]
+        self.handled_interactions: "OrderedDict[int, None]" = OrderedDict()
+        self.backfill_queues: Dict[str, List[Tuple[Optional[int], str]]] = {}  # ticket number -> lines held while backfilling
+        # Tickets whose live buffer is known to be complete since the last
+        # (re)connect; the rest may have missed messages and are backfilled
+        self.synced_tickets: Set[str] = set()
+        self.connection_epoch = 0  # Bumped on every disconnect
         logger.info("TicketCommands cog initialized")
 
+    async def cog_unload(self):
+        """Send log messages still waiting in the dispatcher before the bot shuts down"""
+        await log_dispatcher.flush()
+
     async def parse_ticket_channel(self, channel_name: str, context: str = "Unknown") -> tuple[str, str]:
         try:
             if not channel_name:
@@ -555,7 +580,160 @@ class TicketCommands(commands.Cog):
             logger.error(f"[DEBUG] {context} - Error parsing channel name: {str(e)}")
             return ("", "")
 
+    async def buffer_transcript_line(self, message: discord.Message, line: str, message_id: Optional[int] = None):
+        """Append a line to the live transcript if the message is in an open ticket"""
+        if message.guild is None:
+            return
+        ticket_number = storage.get_ticket_by_channel(str(message.channel.id))
+        if ticket_number is None:
+            return
+        if ticket_number in self.backfill_queues:
+            # Written after the backfilled history so the transcript stays in order
+            self.backfill_queues[ticket_number].append((message_id, line))
+            return
+        try:
+            await async_storage.run(transcript_buffer.append, ticket_number, line, message_id)
+        except Exception as e:
+            logger.error(f"Error buffering transcript line for ticket {ticket_number}: {e}")
+
+    def mark_synced(self, ticket_number: str, epoch: int):
+        """Record that a ticket's buffer is complete, unless the bot disconnected since epoch"""
+        if epoch == self.connection_epoch:
+            self.synced_tickets.add(ticket_number)
+
+    async def backfill_transcript(self, ticket_number: str, channel: discord.TextChannel):
+        """Buffer messages the listeners missed, e.g. while the bot was offline.
+
+        Does nothing for tickets already synced since the last (re)connect, so
+        closing a ticket normally costs no history requests.
+        """
+        if ticket_number in self.backfill_queues or ticket_number in self.synced_tickets:
+            return
+        epoch = self.connection_epoch
+        last_id = await async_storage.run(transcript_buffer.last_message_id, ticket_number)
+        if last_id is None:
+            return  # No live buffer; the transcript is read from channel history at close
+        self.backfill_queues[ticket_number] = []
+        complete = False
+        try:
+            lines = []
+            newest = last_id
+            after = discord.Object(id=last_id) if last_id else None
+            async for message in channel.history(limit=None, after=after, oldest_first=True):
+                if not message.author.bot or message.embeds:  # Include bot messages with embeds
+                    lines.append(format_transcript_line(message))
+                newest = message.id
+            complete = True
+        except Exception as e:
+            logger.error(f"Error backfilling transcript for ticket {ticket_number}: {e}")
+        finally:
+            held = self.backfill_queues.pop(ticket_number, [])
+        for message_id, line in held:
+            if message_id is None or message_id > newest:
+                lines.append(line)
+                newest = max(newest, message_id or 0)
+        if lines:
+            await async_storage.run(transcript_buffer.append, ticket_number, "".join(lines), newest)
+            logger.info(f"Backfilled {len(lines)} transcript lines for ticket {ticket_number}")
+        if complete:
+            self.mark_synced(ticket_number, epoch)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not message.author.bot or message.embeds:  # Include bot messages with embeds
+            await self.buffer_transcript_line(message, format_transcript_line(message), message.id)
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        if before.content != after.content and not after.author.bot:
+            await self.buffer_transcript_line(after, format_transcript_line(after, "edited"))
+
+    @commands.Cog.listener()
+    async def on_message_delete(self, message: discord.Message):
+        if not message.author.bot:
+            await self.buffer_transcript_line(message, format_transcript_line(message, "deleted"))
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if isinstance(after, discord.CategoryChannel):
+            if before.name != after.name:
+                self.category_shards.categories_changed(after.guild)
+        elif before.category_id != after.category_id:
+            self.category_shards.channel_removed(before, before.category_id, self.active_categories)
+            self.category_shards.channel_added(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self.category_shards.channel_removed(channel, channel.category_id, self.active_categories)
+        # The close button records the closure before deleting the channel, so
+        # an indexed channel here was deleted by hand; close its ticket so the
+        # creator can open a new one
+        ticket_number = storage.get_ticket_by_channel(str(channel.id))
+        if ticket_number is None:
+            return
+        try:
+            await self.TicketControls(self.bot, ticket_number, None).record_closure()
+            await async_storage.run(transcript_buffer.discard, ticket_number)
+            self.synced_tickets.discard(ticket_number)
+            logger.info(f"Closed ticket {ticket_number} after its channel was deleted")
+        except Exception as e:
+            logger.error(f"Error closing ticket {ticket_number} for deleted channel: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        self.category_shards.channel_added(channel)
+
+        # Re-link an open ticket whose channel was recreated by hand under the same name
+        ticket_number = storage.parse_ticket_number(channel.name)
+        if ticket_number is None or storage.get_ticket_by_channel(str(channel.id)) == ticket_number:
+            return
+        current_channel_id = storage.get_ticket_channel(ticket_number)
+        if current_channel_id is None or channel.guild.get_channel(int(current_channel_id)) is not None:
+            return
+        await async_storage.set_ticket_channel(ticket_number, str(channel.id))
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        # Messages may be missed until the next backfill
+        self.connection_epoch += 1
+        self.synced_tickets.clear()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Catch up on messages sent to open tickets while the bot was offline
+        backfills = []
+        for ticket in await async_storage.run(storage.get_open_tickets):
+            channel = self.bot.get_channel(int(ticket['channel_id'])) if ticket.get('channel_id') else None
+            if channel and ticket['ticket_number'] not in self.synced_tickets:
+                backfills.append(self.backfill_transcript(ticket['ticket_number'], channel))
+        await asyncio.gather(*backfills)
+
+        # Fill the warm channel pool for guilds that enable it
+        for guild in self.bot.guilds:
+            config = guild_config.get(guild.id)
+            if config["ticket_pool_size"] <= 0:
+                continue
+            self.channel_pool.discover(guild)
+            for category in self.active_categories:
+                category_channel = config.category(guild, category)
+                if category_channel:
+                    self.channel_pool.schedule_refill(category_channel, config["ticket_pool_size"])
+
     async def create_ticket_channel(self, interaction: discord.Interaction, category: str, details: Optional[str] = None):
+        """Create a ticket at most once per interaction and one at a time per user"""
+        if interaction.id in self.handled_interactions:
+            logger.warning(f"Ignoring repeated ticket creation for interaction {interaction.id}")
+            return None
+        self.handled_interactions[interaction.id] = None
+        if len(self.handled_interactions) > MAX_HANDLED_INTERACTIONS:
+            self.handled_interactions.popitem(last=False)
+
+        # The open-ticket check below runs under the lock, so a second submission
+        # from the same user waits and then finds the first ticket
+        async with self.creation_locks[interaction.user.id % TICKET_LOCK_STRIPES]:
+            return await self.open_ticket_channel(interaction, category, details)
+
+    async def open_ticket_channel(self, interaction: discord.Interaction, category: str, details: Optional[str] = None):
         try:
             logger.info(f"Creating ticket channel for {interaction.user.name} in category {category} with details: {details}")
 
@@ -580,13 +758,11 @@ class TicketCommands(commands.Cog):
                         logger.error(f"Error converting channel ID: {e}")
                         # Continue with new ticket creation since the existing one seems invalid
 
-            category_channel = discord.utils.get(interaction.guild.categories, name=category)
-            if not category_channel:
-                category_channel = await interaction.guild.create_category(category)
-                logger.info(f"Created new category: {category}")
+            config = guild_config.get(interaction.guild.id)
+            primary_category = config.category(interaction.guild, category)
 
             # Ensure ticket_number is always a string
-            ticket_number = str(storage.get_next_ticket_number() or "ERROR")
+            ticket_number = str(await async_storage.get_next_ticket_number() or "ERROR")
             if ticket_number == "ERROR":
                 logger.error("Failed to generate ticket number")
                 await interaction.followup.send("Error creating ticket: Failed to generate ticket number", ephemeral=True)
@@ -597,32 +773,49 @@ class TicketCommands(commands.Cog):
             channel_name = f"ticket-{ticket_number}"
             logger.info(f"Generated channel name: {channel_name}")
 
-            staff_role = discord.utils.get(interaction.guild.roles, name="Staff")
-            admin_role = discord.utils.get(interaction.guild.roles, name="Admin")
-            carriers_role = discord.utils.get(interaction.guild.roles, id=1280539104832127008)
-
             overwrites = {
                 interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
                 interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True),
                 interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True)
             }
 
-            if staff_role:
-                overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-            if admin_role:
-                overwrites[admin_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-            if carriers_role:
-                overwrites[carriers_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            for access_role in config.roles(interaction.guild, "ticket_access_roles"):
+                overwrites[access_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
 
-            ticket_channel = await category_channel.create_text_channel(
-                name=channel_name,
-                overwrites=overwrites
-            )
+            # Claim a pre-created channel when the pool has one, otherwise create it now
+            # (pool channels live in the primary category and are already counted there)
+            ticket_channel = None
+            if primary_category:
+                ticket_channel = await self.channel_pool.claim(primary_category, channel_name, overwrites, config["ticket_pool_size"])
+            if ticket_channel is None:
+                # Use the first category shard for this ticket type that is under Discord's channel cap
+                category_channel = await self.category_shards.acquire(interaction.guild, category)
+                try:
+                    ticket_channel = await category_channel.create_text_channel(
+                        name=channel_name,
+                        overwrites=overwrites
+                    )
+                finally:
+                    self.category_shards.release(category_channel)
+                self.category_shards.channel_added(ticket_channel)
             logger.info(f"Created ticket channel: {ticket_channel.name}")
 
+            # Store ticket information before posting so the transcript buffer captures every message
+            epoch = self.connection_epoch
+            await async_storage.run(transcript_buffer.start, ticket_number)
+            self.mark_synced(ticket_number, epoch)
+            stored = await async_storage.create_ticket(
+                ticket_number=ticket_number,  # Now guaranteed to be a string
+                user_id=str(interaction.user.id),
+                channel_id=str(ticket_channel.id),
+                category=category,
+                details=details or ""  # Ensure details is never None
+            )
+            logger.info(f"[DEBUG] Ticket {ticket_number} stored with details: {details}")
+
             # Create welcome message for carry tickets - mention Carriers role
-            carrier_role = discord.utils.get(interaction.guild.roles, id=1280539104832127008)
-            carrier_mention = f"<@&1280539104832127008>" if carrier_role else "@Carriers (role not found)"
+            carrier_role = config.role(interaction.guild, "carriers_role")
+            carrier_mention = carrier_role.mention if carrier_role else "@Carriers (role not found)"
             
             # Format details nicely
             formatted_details = details.replace("**", "").replace("🏰 Dungeon Carry Request", "🏰 Dungeon Carry Request").replace("⚔️ Slayer Carry Request", "⚔️ Slayer Carry Request") if details else "No details provided"
@@ -663,19 +856,8 @@ class TicketCommands(commands.Cog):
                 embed=welcome_embed,
                 view=controls
             )
-            # Store message reference for timeout handling
             controls.message = control_message
 
-            # Store ticket information
-            stored = storage.create_ticket(
-                ticket_number=ticket_number,  # Now guaranteed to be a string
-                user_id=str(interaction.user.id),
-                channel_id=str(ticket_channel.id),
-                category=category,
-                details=details or ""  # Ensure details is never None
-            )
-            logger.info(f"[DEBUG] Ticket {ticket_number} stored with details: {details}")
-
             await interaction.followup.send(
                 embed=discord.Embed(
                     title="✨ Ticket Created",
@@ -705,13 +887,16 @@ class TicketCommands(commands.Cog):
 
     class TicketControls(discord.ui.View):
         def __init__(self, bot, ticket_number: str, user: discord.User):
-            super().__init__(timeout=86400)  # Set 24 hour timeout
+            super().__init__(timeout=None)  # Buttons are served by the dynamic item handlers below
             self.bot = bot
             self.ticket_number = ticket_number
             self.user = user
             self.claimed_by = None
             self.message: Optional[discord.Message] = None
 
+            self.add_item(TicketCloseButton(ticket_number))
+            self.add_item(TicketPriorityButton(ticket_number))
+
             # Button will always be enabled and check cooldown when clicked
 
             logger.info(f"Initializing TicketControls for ticket {ticket_number}")
@@ -721,43 +906,28 @@ class TicketCommands(commands.Cog):
             # Keep button always enabled - cooldown check will be done when clicked
             pass
 
-        async def on_timeout(self) -> None:  # Add return type annotation
-            try:
-                logger.info("TicketControls timeout triggered - refreshing view")
-
-                if not isinstance(self.message, discord.Message):
-                    logger.error("Invalid message reference in TicketControls")
-                    return
-
-                # Use self.__class__ to avoid TicketControls reference error
-                new_view = self.__class__(self.bot)
-                await self.message.edit(view=new_view)
-                logger.info("Successfully refreshed TicketControls view after timeout")
-            except Exception as e:
-                logger.error(f"Error refreshing TicketControls view after timeout: {e}")
-
         async def parse_ticket_channel(self, channel_name: str, context: str = "Unknown") -> tuple[str, str]:
             return await self.bot.get_cog('TicketCommands').parse_ticket_channel(channel_name, context)
 
+        @classmethod
+        async def for_ticket(cls, bot, ticket_number: str) -> Optional["TicketCommands.TicketControls"]:
+            """Rebuild the controls for an open ticket, or None if it is unknown or closed"""
+            ticket = await async_storage.get_ticket(ticket_number)
+            if not ticket or ticket.get('status') != 'open':
+                return None
+            user = bot.get_user(int(ticket['user_id']))
+            if user is None:
+                try:
+                    user = await bot.fetch_user(int(ticket['user_id']))
+                except discord.HTTPException as e:
+                    logger.error(f"Could not fetch creator of ticket {ticket_number}: {e}")
+                    return None
+            return cls(bot, ticket_number, user)
 
-
-        
-
-        
-
-        @discord.ui.button(label="Close", style=discord.ButtonStyle.red, custom_id="close", row=1)
-        async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        async def close_ticket(self, interaction: discord.Interaction):
             try:
                 # Permission check - only Carriers role and above can close tickets
-                has_permission = False
-                required_roles = ["Carriers", "Staff", "Ticket Support", "Ticket Admin", "Admin"]
-
-                for role in interaction.user.roles:
-                    if role.name in required_roles:
-                        has_permission = True
-                        break
-
-                if not has_permission:
+                if not guild_config.get(interaction.guild.id).has_role(interaction.user, "ticket_close_roles"):
                     await interaction.response.send_message(
                         "Only Carriers and higher roles can close tickets!",
                         ephemeral=True
@@ -768,17 +938,15 @@ class TicketCommands(commands.Cog):
 
                 # Create transcript
                 await self.create_and_send_transcript(interaction, "Manual closure by staff")
+                await self.record_closure()
 
-                # Delete the channel after transcript is sent
-                await asyncio.sleep(3)
+                # Delete the channel now that the transcript has been delivered
                 await interaction.channel.delete()
             except Exception as e:
                   logger.error(f"Error in close ticket button: {e}")
                   await interaction.response.send_message("An error occurred.", ephemeral=True)
 
-        # Priority select button
-        @discord.ui.button(label="Priority Select", style=discord.ButtonStyle.grey, custom_id="priority_select", row=1)
-        async def priority_select(self, interaction: discord.Interaction, button: discord.ui.Button):
+        async def priority_select(self, interaction: discord.Interaction):
             try:
                 # Everyone can select priority
                 priority_view = PrioritySelectView(self.bot, self.ticket_number)
@@ -853,32 +1021,67 @@ class TicketCommands(commands.Cog):
         #        logger.error(f"Error in delete button: {e}")
         #        await interaction.response.send_message("An error occurred.", ephemeral=True)
 
+        async def record_closure(self):
+            """Mark the ticket closed and add it to the creator's ticket history"""
+            try:
+                ticket = await async_storage.get_ticket(self.ticket_number)
+                closed = await async_storage.close_ticket(self.ticket_number)
+                # Only the call that actually closed the ticket records it, so
+                # concurrent close paths do not add duplicate history entries
+                if closed and ticket:
+                    claimed_by = await async_storage.get_ticket_claimed_by(self.ticket_number)
+                    await async_storage.add_ticket_to_history(ticket['user_id'], self.ticket_number, ticket['category'], claimed_by)
+            except Exception as e:
+                logger.error(f"Error recording closure of ticket {self.ticket_number}: {e}")
+
+        async def timed_delivery(self, target: str, delivery) -> None:
+            """Await one close-time delivery, logging its duration and isolating its errors"""
+            started = time.perf_counter()
+            try:
+                await delivery
+                logger.info(f"Ticket {self.ticket_number} {target} delivered in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                logger.error(f"Could not deliver ticket {self.ticket_number} {target}: {e}")
+
         async def create_and_send_transcript(self, interaction: discord.Interaction, closing_reason: str = "Ticket closed"):
             try:
-                # Create transcript file
-                transcript_content = f"Ticket {self.ticket_number} Transcript\n"
-                transcript_content += f"Created by: {self.user.display_name} ({self.user.id})\n"
-                transcript_content += f"Closed by: {interaction.user.display_name} ({interaction.user.id})\n"
-                transcript_content += f"Closing reason: {closing_reason}\n"
-                transcript_content += f"Created at: {interaction.channel.created_at}\n"
-                transcript_content += f"Closed at: {interaction.created_at}\n"
-                transcript_content += "=" * 50 + "\n\n"
-
-                # Get messages from channel
-                messages = []
-                async for message in interaction.channel.history(limit=None, oldest_first=True):
-                    if not message.author.bot or message.embeds:  # Include bot messages with embeds
-                        timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
-                        content = message.content or "[Embed/File]"
-                        transcript_content += f"[{timestamp}] {message.author.display_name}: {content}\n"
-
-                # Save transcript file
                 transcript_filename = f"transcripts/ticket_{self.ticket_number}.txt"
-                import os
                 os.makedirs("transcripts", exist_ok=True)
+                header = (
+                    f"Ticket {self.ticket_number} Transcript\n"
+                    f"Created by: {self.user.display_name} ({self.user.id})\n"
+                    f"Closed by: {interaction.user.display_name} ({interaction.user.id})\n"
+                    f"Closing reason: {closing_reason}\n"
+                    f"Created at: {interaction.channel.created_at}\n"
+                    f"Closed at: {interaction.created_at}\n"
+                    + "=" * 50 + "\n\n"
+                )
 
-                with open(transcript_filename, "w", encoding="utf-8") as f:
-                    f.write(transcript_content)
+                # Use the live buffer captured by the message listeners when there is one,
+                # topped up with anything they missed if the bot disconnected since
+                ticket_commands = interaction.client.get_cog('TicketCommands')
+                if ticket_commands:
+                    await ticket_commands.backfill_transcript(self.ticket_number, interaction.channel)
+                    ticket_commands.synced_tickets.discard(self.ticket_number)
+                buffered = await async_storage.run(transcript_buffer.finish, self.ticket_number, header, transcript_filename)
+                if not buffered:
+                    # Ticket predates live buffering: stream the channel history to disk instead
+                    with open(transcript_filename, "w", encoding="utf-8") as f:
+                        f.write(header)
+                        async for message in interaction.channel.history(limit=None, oldest_first=True):
+                            if not message.author.bot or message.embeds:  # Include bot messages with embeds
+                                f.write(format_transcript_line(message))
+                await async_storage.run(transcript_buffer.discard, self.ticket_number)
+
+                # Read the finished file once, archive it, and upload every copy from that buffer
+                with open(transcript_filename, "rb") as f:
+                    transcript_bytes = f.read()
+                try:
+                    await async_storage.run(transcript_archive.archive_transcript, self.ticket_number, transcript_bytes)
+                    os.remove(transcript_filename)
+                except Exception as e:
+                    logger.error(f"Could not archive transcript for ticket {self.ticket_number}, keeping {transcript_filename}: {e}")
+                transcript_upload_name = f"ticket_{self.ticket_number}_transcript.txt"
 
                 # Send transcript to user
                 transcript_embed = discord.Embed(
@@ -894,17 +1097,16 @@ class TicketCommands(commands.Cog):
                 )
                 transcript_embed.set_image(url="https://media.discordapp.net/attachments/1250029348690464820/1401226777485119529/ChatGPT_Image_Aug_2_2025_11_34_17_AM.png?ex=688f81a1&is=688e3021&hm=c5cc9782fd8c48a43d3f45fa62ef293a62fd6847c996be0714d57dbfc053d0d6&=&format=webp&quality=lossless&width=1208&height=805")
 
-                try:
-                    with open(transcript_filename, 'rb') as f:
-                        file = discord.File(f, filename=f"ticket_{self.ticket_number}_transcript.txt")
+                async def send_user_transcript():
+                    try:
+                        file = discord.File(io.BytesIO(transcript_bytes), filename=transcript_upload_name)
                         await self.user.send(embed=transcript_embed, file=file)
-                except discord.Forbidden:
-                    logger.warning(f"Could not send transcript to {self.user.display_name}")
+                    except discord.Forbidden:
+                        logger.warning(f"Could not send transcript to {self.user.display_name}")
 
                 # Send transcript to transcript channel
-                transcript_channel_id = "1282718429161197600"  # Updated transcript channel ID
-                try:
-                    transcript_channel = interaction.guild.get_channel(int(transcript_channel_id))
+                async def send_channel_transcript():
+                    transcript_channel = guild_config.get(interaction.guild.id).channel(interaction.guild, "transcript_channel")
                     if transcript_channel:
                         # Create a separate embed for the transcript channel
                         channel_transcript_embed = discord.Embed(
@@ -917,20 +1119,23 @@ class TicketCommands(commands.Cog):
                             color=discord.Color.from_rgb(88, 101, 242)
                         )
                         channel_transcript_embed.set_image(url="https://media.discordapp.net/attachments/1250029348690464820/1401226777485119529/ChatGPT_Image_Aug_2_2025_11_34_17_AM.png?ex=688f81a1&is=688e3021&hm=c5cc9782fd8c48a43d3f45fa62ef293a62fd6847c996be0714d57dbfc053d0d6&=&format=webp&quality=lossless&width=1208&height=805")
-                        
-                        with open(transcript_filename, 'rb') as f:
-                            file = discord.File(f, filename=f"ticket_{self.ticket_number}_transcript.txt")
-                            await transcript_channel.send(embed=channel_transcript_embed, file=file)
-                except Exception as e:
-                    logger.error(f"Could not send transcript to channel: {e}")
 
-                # Send feedback request
-                await self.send_feedback_request(interaction.user)
+                        file = discord.File(io.BytesIO(transcript_bytes), filename=transcript_upload_name)
+                        await transcript_channel.send(embed=channel_transcript_embed, file=file)
+
+                # Deliver the transcripts and the feedback request concurrently
+                started = time.perf_counter()
+                await asyncio.gather(
+                    self.timed_delivery("user transcript", send_user_transcript()),
+                    self.timed_delivery("channel transcript", send_channel_transcript()),
+                    self.timed_delivery("feedback request", self.send_feedback_request(interaction.user, interaction.guild.id))
+                )
+                logger.info(f"Delivered ticket {self.ticket_number} transcript in {time.perf_counter() - started:.2f}s")
 
             except Exception as e:
                 logger.error(f"Error creating transcript: {e}")
 
-        async def send_feedback_request(self, closer: discord.User):
+        async def send_feedback_request(self, closer: discord.User, guild_id: int):
             try:
                 feedback_embed = discord.Embed(
                     title="Rate & Give Feedback",
@@ -946,7 +1151,7 @@ class TicketCommands(commands.Cog):
 
                 # Create single feedback button
                 feedback_view = discord.ui.View(timeout=86400)  # 24 hours
-                feedback_view.add_item(FeedbackButton(self.ticket_number))
+                feedback_view.add_item(FeedbackButton(self.ticket_number, guild_id))
 
                 # Send DM to user
                 try:
@@ -957,7 +1162,7 @@ class TicketCommands(commands.Cog):
             except Exception as e:
                 logger.error(f"Error sending feedback request: {e}")
 
-        async def send_feedback_and_transcript(self, creator: discord.User, closer: discord.User, transcript_file: str):
+        async def send_feedback_and_transcript(self, creator: discord.User, closer: discord.User, transcript_file: str, guild_id: int):
             try:
                 # Send feedback request
                 feedback_embed = discord.Embed(
@@ -974,7 +1179,7 @@ class TicketCommands(commands.Cog):
 
                 # Create single feedback button
                 feedback_view = discord.ui.View(timeout=86400)  # 24 hours
-                feedback_view.add_item(FeedbackButton(self.ticket_number))
+                feedback_view.add_item(FeedbackButton(self.ticket_number, guild_id))
 
                 # Send DM to user
                 try:
@@ -1015,5 +1220,63 @@ class TicketCommands(commands.Cog):
                     button = StarRatingButton(rating=i)
                     self.add_item(button)
 
+# Ticket buttons are dynamic items: the custom ID carries the ticket number, so a
+# single stateless handler serves every ticket and nothing is registered per
+# ticket. Buttons posted before ticket numbers were encoded use the bare legacy
+# custom ID; for those the ticket is looked up from the channel instead.
+
+async def resolve_ticket_controls(interaction: discord.Interaction, ticket_number: Optional[str]) -> Optional["TicketCommands.TicketControls"]:
+    """Rebuild the controls for a button's ticket, telling the user if it is gone"""
+    controls = None
+    if ticket_number:
+        controls = await TicketCommands.TicketControls.for_ticket(interaction.client, ticket_number)
+    if controls is None:
+        await interaction.response.send_message("This ticket is closed or no longer tracked.", ephemeral=True)
+    return controls
+
+class TicketCloseButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?:ticket:close:(?P<ticket_number>[0-9]+)|close)'):
+    def __init__(self, ticket_number: Optional[str]):
+        super().__init__(discord.ui.Button(
+            label="Close",
+            style=discord.ButtonStyle.red,
+            custom_id=f"ticket:close:{ticket_number}",
+            row=1
+        ))
+        self.ticket_number = ticket_number
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['ticket_number'] or storage.get_ticket_by_channel(str(interaction.channel_id)))
+
+    async def callback(self, interaction: discord.Interaction):
+        try:
+            controls = await resolve_ticket_controls(interaction, self.ticket_number)
+            if controls:
+                await controls.close_ticket(interaction)
+        except Exception as e:
+            logger.error(f"Error in close ticket button: {e}")
+
+class TicketPriorityButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?:ticket:priority:(?P<ticket_number>[0-9]+)|priority_select)'):
+    def __init__(self, ticket_number: Optional[str]):
+        super().__init__(discord.ui.Button(
+            label="Priority Select",
+            style=discord.ButtonStyle.grey,
+            custom_id=f"ticket:priority:{ticket_number}",
+            row=1
+        ))
+        self.ticket_number = ticket_number
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['ticket_number'] or storage.get_ticket_by_channel(str(interaction.channel_id)))
+
+    async def callback(self, interaction: discord.Interaction):
+        try:
+            controls = await resolve_ticket_controls(interaction, self.ticket_number)
+            if controls:
+                await controls.priority_select(interaction)
+        except Exception as e:
+            logger.error(f"Error in priority select button: {e}")
+
 async def setup(bot):
     await bot.add_cog(TicketCommands(bot))
\ No newline at end of file
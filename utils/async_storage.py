@@ -0,0 +1,58 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Any
+from utils import storage
+
+logger = logging.getLogger('discord')
+
+# Awaitable wrappers around utils.storage for use inside event handlers.
+# Storage calls touch the disk, so they run on one dedicated worker thread
+# (which also keeps them in order) instead of on the gateway event loop.
+
+MAX_PENDING_CALLS = 256  # Callers wait once this many storage calls are queued
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+_pending_slots: Optional[asyncio.Semaphore] = None
+
+def _get_pending_slots() -> asyncio.Semaphore:
+    global _pending_slots
+    if _pending_slots is None:
+        _pending_slots = asyncio.Semaphore(MAX_PENDING_CALLS)
+    return _pending_slots
+
+async def run(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking storage function on the storage thread"""
+    async with _get_pending_slots():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def _awaitable(func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+    return wrapper
+
+async def warm_up() -> None:
+    """Open the database and load open tickets before the first interaction"""
+    await run(storage.get_tickets_by_status, 'open')
+    logger.info("Storage warmed up")
+
+get_next_ticket_number = _awaitable(storage.get_next_ticket_number)
+get_ticket = _awaitable(storage.get_ticket)
+create_ticket = _awaitable(storage.create_ticket)
+close_ticket = _awaitable(storage.close_ticket)
+set_ticket_channel = _awaitable(storage.set_ticket_channel)
+claim_ticket = _awaitable(storage.claim_ticket)
+get_ticket_claimed_by = _awaitable(storage.get_ticket_claimed_by)
+store_feedback = _awaitable(storage.store_feedback)
+get_feedback = _awaitable(storage.get_feedback)
+store_ticket_log = _awaitable(storage.store_ticket_log)
+get_ticket_log = _awaitable(storage.get_ticket_log)
+add_ticket_to_history = _awaitable(storage.add_ticket_to_history)
+get_user_ticket_history = _awaitable(storage.get_user_ticket_history)
+store_last_call_for_help = _awaitable(storage.store_last_call_for_help)
+get_last_call_for_help = _awaitable(storage.get_last_call_for_help)
+set_ticket_priority = _awaitable(storage.set_ticket_priority)
+get_ticket_priority = _awaitable(storage.get_ticket_priority)
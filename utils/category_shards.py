@@ -0,0 +1,144 @@
+import re
+import asyncio
+import logging
+import discord
+from typing import Optional, Dict, Set, List
+
+logger = logging.getLogger('discord')
+
+# Discord caps a category at CATEGORY_CHANNEL_LIMIT channels, so each ticket
+# type spreads over numbered overflow categories: "Dungeon Carry",
+# "Dungeon Carry 2", "Dungeon Carry 3", ... Occupancy is cached as the set of
+# channel ids in each category (CategoryChannel.channels scans the whole
+# guild) and kept current by the channel events the cog forwards here.
+
+CATEGORY_CHANNEL_LIMIT = 50
+
+def shard_name(base_name: str, index: int) -> str:
+    return base_name if index == 1 else f"{base_name} {index}"
+
+class TicketCategoryShards:
+    def __init__(self):
+        self.occupants: Dict[int, Set[int]] = {}  # category id -> channel ids in it
+        self.reserved: Dict[int, int] = {}  # category id -> channels being created in it
+        self.indexed_guilds: Set[int] = set()
+        self.category_names: Dict[int, Dict[str, int]] = {}  # guild id -> category name -> id
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.tasks: Set[asyncio.Task] = set()  # Running retirements, referenced so they are not garbage collected
+
+    def _index_guild(self, guild: discord.Guild) -> None:
+        """Count the channels in every category with one pass over the guild"""
+        if guild.id in self.indexed_guilds:
+            return
+        for category in guild.categories:
+            self.occupants.setdefault(category.id, set())
+        for channel in guild.channels:
+            if channel.category_id:
+                self.occupants.setdefault(channel.category_id, set()).add(channel.id)
+        self.indexed_guilds.add(guild.id)
+
+    def categories_changed(self, guild: discord.Guild) -> None:
+        """Forget the category names after a category was created, renamed or deleted"""
+        self.category_names.pop(guild.id, None)
+
+    def shards(self, guild: discord.Guild, base_name: str) -> Dict[int, discord.CategoryChannel]:
+        """Get a ticket type's categories keyed by shard index"""
+        names = self.category_names.get(guild.id)
+        if names is None:
+            names = self.category_names[guild.id] = {}
+            for category in guild.categories:
+                names.setdefault(category.name, category.id)
+        pattern = re.compile(rf"^{re.escape(base_name)}(?: (\d+))?$")
+        found = {}
+        for name, category_id in names.items():
+            match = pattern.match(name)
+            category = guild.get_channel(category_id) if match else None
+            if category:
+                found.setdefault(int(match.group(1) or 1), category)
+        return found
+
+    def free_slots(self, category_id: int) -> int:
+        return CATEGORY_CHANNEL_LIMIT - len(self.occupants.get(category_id, ())) - self.reserved.get(category_id, 0)
+
+    async def acquire(self, guild: discord.Guild, base_name: str) -> discord.CategoryChannel:
+        """Reserve a slot in the first shard with room, creating a new shard if all are full.
+
+        The caller must release() the reservation once its channel has been
+        created (and counted with channel_added) or has failed to be created.
+        """
+        self._index_guild(guild)
+        async with self.locks.setdefault(guild.id, asyncio.Lock()):
+            shards = self.shards(guild, base_name)
+            category = next((shards[index] for index in sorted(shards) if self.free_slots(shards[index].id) > 0), None)
+            if category is None:
+                index = max(shards, default=0) + 1
+                primary = shards.get(1)
+                category = await guild.create_category(
+                    shard_name(base_name, index),
+                    overwrites=primary.overwrites if primary else discord.utils.MISSING
+                )
+                self.occupants.setdefault(category.id, set())
+                self.categories_changed(guild)
+                logger.info(f"Created ticket category shard: {category.name}")
+            self.reserved[category.id] = self.reserved.get(category.id, 0) + 1
+            return category
+
+    def reserve(self, category: discord.CategoryChannel) -> bool:
+        """Reserve a slot in one particular category, or return False if it is full.
+
+        As with acquire(), a successful reservation must be release()d.
+        """
+        self._index_guild(category.guild)
+        if self.free_slots(category.id) <= 0:
+            return False
+        self.reserved[category.id] = self.reserved.get(category.id, 0) + 1
+        return True
+
+    def release(self, category: discord.CategoryChannel) -> None:
+        """Give back an acquire() reservation"""
+        self.reserved[category.id] = max(0, self.reserved.get(category.id, 0) - 1)
+
+    def channel_added(self, channel: discord.abc.GuildChannel) -> None:
+        if isinstance(channel, discord.CategoryChannel):
+            self.occupants.setdefault(channel.id, set())
+            self.categories_changed(channel.guild)
+        elif channel.category_id:
+            self.occupants.setdefault(channel.category_id, set()).add(channel.id)
+
+    def channel_removed(self, channel: discord.abc.GuildChannel, category_id: Optional[int], base_names: List[str]) -> None:
+        """Uncount a channel that left category_id and retire the shard if it is now empty"""
+        if isinstance(channel, discord.CategoryChannel):
+            self.occupants.pop(channel.id, None)
+            self.reserved.pop(channel.id, None)
+            self.categories_changed(channel.guild)
+            return
+        if not category_id or channel.guild.id not in self.indexed_guilds:
+            return
+        occupants = self.occupants.get(category_id)
+        if occupants is None:
+            return
+        occupants.discard(channel.id)
+        if occupants or self.reserved.get(category_id):
+            return
+        category = channel.guild.get_channel(category_id)
+        if category is None:
+            return
+        for base_name in base_names:
+            shards = self.shards(channel.guild, base_name)
+            if any(index > 1 and shard.id == category_id for index, shard in shards.items()):
+                task = asyncio.create_task(self._retire(category))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                return
+
+    async def _retire(self, category: discord.CategoryChannel) -> None:
+        async with self.locks.setdefault(category.guild.id, asyncio.Lock()):
+            if self.occupants.get(category.id) or self.reserved.get(category.id):
+                return  # Reused while waiting for the lock
+            try:
+                await category.delete(reason="Empty ticket category shard")
+                logger.info(f"Retired empty ticket category shard: {category.name}")
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                logger.error(f"Error retiring ticket category shard {category.name}: {e}")
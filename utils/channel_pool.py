@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import discord
+from typing import Optional, Dict, List, Set, Any
+from utils import rename_scheduler
+from utils.category_shards import TicketCategoryShards
+
+logger = logging.getLogger('discord')
+
+# Warm pool of hidden, pre-created ticket channels. Creating a ticket then
+# takes one channel edit (rename + permission overwrites) instead of creating
+# a channel on the user's critical path. Pool channels carry POOL_CHANNEL_NAME
+# until they are claimed, so they are found again after a restart. Refills
+# reserve their slots through the category shards, so pool channels count
+# towards the category's channel limit while they are being created.
+
+POOL_CHANNEL_NAME = "ticket-pool"
+
+class TicketChannelPool:
+    def __init__(self, shards: TicketCategoryShards):
+        self.shards = shards
+        self.idle: Dict[int, List[int]] = {}  # category id -> idle pool channel ids
+        self.discovered: Set[int] = set()  # Guilds whose existing pool channels have been found
+        self.refilling: Set[int] = set()  # Categories with a refill task running
+        self.tasks: Set[asyncio.Task] = set()  # Running refills, referenced so they are not garbage collected
+
+    def discover(self, guild: discord.Guild) -> None:
+        """Pick up pool channels left over from a previous run"""
+        if guild.id in self.discovered:
+            return
+        self.discovered.add(guild.id)
+        for channel in guild.text_channels:
+            if channel.name == POOL_CHANNEL_NAME and channel.category_id:
+                self.idle.setdefault(channel.category_id, []).append(channel.id)
+        logger.info(f"Found {sum(len(ids) for ids in self.idle.values())} pooled ticket channels in {guild.name}")
+
+    def hidden_overwrites(self, guild: discord.Guild) -> Dict[Any, discord.PermissionOverwrite]:
+        return {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+        }
+
+    async def claim(self, category: discord.CategoryChannel, name: str,
+                    overwrites: Dict[Any, discord.PermissionOverwrite], size: int) -> Optional[discord.TextChannel]:
+        """Turn an idle pool channel into a ticket channel, or None if the pool is empty"""
+        if size <= 0:
+            return None
+        idle = self.idle.get(category.id, [])
+        claimed = None
+        while idle and claimed is None:
+            channel = category.guild.get_channel(idle.pop())
+            if channel is None:
+                continue  # Deleted while idle
+            try:
+                await channel.edit(name=name, overwrites=overwrites)
+                rename_scheduler.record_rename(channel.id)
+                claimed = channel
+            except discord.HTTPException as e:
+                logger.error(f"Could not claim pooled channel {channel.id}: {e}")
+        self.schedule_refill(category, size)
+        return claimed
+
+    def schedule_refill(self, category: discord.CategoryChannel, size: int) -> None:
+        """Top a category's pool back up to size in the background"""
+        if size <= 0 or category.id in self.refilling:
+            return
+        self.refilling.add(category.id)
+        task = asyncio.create_task(self._refill(category, size))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _refill(self, category: discord.CategoryChannel, size: int) -> None:
+        try:
+            idle = self.idle.setdefault(category.id, [])
+            while len(idle) < size:
+                if not self.shards.reserve(category):
+                    logger.warning(f"{category.name} is full, ticket channel pool stays at {len(idle)}")
+                    break
+                try:
+                    channel = await category.create_text_channel(
+                        name=POOL_CHANNEL_NAME,
+                        overwrites=self.hidden_overwrites(category.guild)
+                    )
+                    self.shards.channel_added(channel)
+                finally:
+                    self.shards.release(category)
+                idle.append(channel.id)
+            logger.info(f"Ticket channel pool for {category.name} is at {len(idle)}")
+        except Exception as e:
+            logger.error(f"Error refilling ticket channel pool for {category.name}: {e}")
+        finally:
+            self.refilling.discard(category.id)
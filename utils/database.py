@@ -0,0 +1,145 @@
+import os
+import atexit
+import sqlite3
+import logging
+import threading
+from typing import Optional, Any, Iterable, List
+
+logger = logging.getLogger('discord')
+
+DATABASE_FILE = "data/bot.db"
+COMMIT_BATCH_SIZE = 100  # Commit once this many writes are pending
+COMMIT_INTERVAL = 0.5  # Seconds a write may wait for its batch to be committed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_number TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    closed_at TEXT,
+    details TEXT NOT NULL DEFAULT '',
+    priority TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
+CREATE INDEX IF NOT EXISTS idx_tickets_user_status ON tickets(user_id, status);
+
+CREATE TABLE IF NOT EXISTS claimed_tickets (
+    ticket_number TEXT PRIMARY KEY,
+    staff_member TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    ticket_number TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    feedback TEXT NOT NULL,
+    suggestions TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ticket_logs (
+    ticket_number TEXT PRIMARY KEY,
+    messages TEXT NOT NULL,
+    creator_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    claimed_by TEXT,
+    closed_by TEXT,
+    closed_at TEXT NOT NULL,
+    details TEXT
+);
+
+CREATE TABLE IF NOT EXISTS help_calls (
+    ticket_number TEXT PRIMARY KEY,
+    called_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class Database:
+    """SQLite store in WAL mode with batched commits.
+
+    Writes are applied to the shared connection immediately, so reads see them
+    at once, and are committed in batches: when COMMIT_BATCH_SIZE writes are
+    pending or COMMIT_INTERVAL seconds after the first pending write.
+    """
+
+    def __init__(self, path: str = DATABASE_FILE):
+        self.path = path
+        self.lock = threading.RLock()
+        self.pending_writes = 0
+        self.commit_timer: Optional[threading.Timer] = None
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level="DEFERRED")
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        logger.info(f"Opened database {path}")
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> None:
+        """Run a write statement as part of the current batch"""
+        with self.lock:
+            self.connection.execute(sql, tuple(params))
+            self._schedule_commit()
+
+    def execute_now(self, sql: str, params: Iterable[Any] = ()) -> None:
+        """Run a write statement and commit it together with any pending batch"""
+        with self.lock:
+            self.connection.execute(sql, tuple(params))
+            self.commit()
+
+    def fetch_one(self, sql: str, params: Iterable[Any] = ()) -> Optional[sqlite3.Row]:
+        with self.lock:
+            return self.connection.execute(sql, tuple(params)).fetchone()
+
+    def fetch_all(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self.lock:
+            return self.connection.execute(sql, tuple(params)).fetchall()
+
+    def _schedule_commit(self) -> None:
+        self.pending_writes += 1
+        if self.pending_writes >= COMMIT_BATCH_SIZE:
+            self.commit()
+        elif self.commit_timer is None:
+            self.commit_timer = threading.Timer(COMMIT_INTERVAL, self.commit)
+            self.commit_timer.daemon = True
+            self.commit_timer.start()
+
+    def commit(self) -> None:
+        """Commit all pending writes"""
+        with self.lock:
+            if self.commit_timer is not None:
+                self.commit_timer.cancel()
+                self.commit_timer = None
+            try:
+                self.connection.commit()
+                self.pending_writes = 0
+            except Exception as e:
+                logger.error(f"Error committing database batch: {e}")
+
+    def close(self) -> None:
+        with self.lock:
+            self.commit()
+            self.connection.close()
+
+_database: Optional[Database] = None
+_database_lock = threading.Lock()
+
+def get_database() -> Database:
+    """Get the shared database, opening it on first use"""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database()
+                atexit.register(_database.close)
+    return _database
@@ -0,0 +1,154 @@
+import os
+import json
+import logging
+import discord
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger('discord')
+
+# Per-guild settings for the roles and channels the bot works with. A role or
+# channel setting is an ID, a name, or (for role settings) a list of either.
+# Each guild's settings are resolved to live objects on first use and cached
+# until a role or channel event touches one of the roles or channels the
+# settings refer to.
+
+GUILD_CONFIG_FILE = "data/guild_config.json"
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    # Roles
+    "setup_roles": [1336379731330994247],  # /ticket_setup, /sendmsg, /chart
+    "carry_submit_roles": [1274788617663025182],  # /carried
+    "carry_approver_roles": [1274788617663025182],  # Approve/decline carry requests
+    "points_view_roles": [1280539104832127008],  # /points, /leaderboard
+    "points_admin_roles": ["Manager", "Admin"],  # /pending_carries, /remove_points, /add_carrier
+    "ticket_access_roles": ["Staff", "Admin", 1280539104832127008],  # Can see new ticket channels
+    "ticket_close_roles": ["Carriers", "Staff", "Ticket Support", "Ticket Admin", "Admin"],
+    "carriers_role": 1280539104832127008,  # Pinged on new tickets and priority changes
+    # Channels
+    "approval_channel": "approve-request",
+    "priority_history_channel": "priority-history",
+    "transcript_channel": 1282718429161197600,
+    "feedback_channel": 1401276435439554580,
+    "points_log_channel": 1401461191028637717,
+    "approved_log_channel": 1401461706764451890,
+    "declined_log_channel": 1401461442145681519,
+    "replacement_log_channel": 1401473630814081145,
+    # Ticket creation
+    "ticket_pool_size": 0,  # Hidden pre-created channels kept per ticket category; 0 disables the pool
+}
+
+class GuildConfig:
+    """Settings for one guild plus the roles and channels they resolve to"""
+
+    def __init__(self, guild_id: int, settings: Dict[str, Any]):
+        self.guild_id = guild_id
+        self.settings = settings
+        self.resolved: Dict[Any, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self.settings[key]
+
+    def invalidate(self) -> None:
+        """Forget resolved objects so the next lookup resolves them again"""
+        self.resolved.clear()
+
+    def refers_to(self, item: discord.abc.Snowflake) -> bool:
+        """Check whether a role or channel is, or by name could become, one of the settings"""
+        names = {name for kind, name in self.resolved if kind == "category"}
+        for value in self.settings.values():
+            for entry in (value if isinstance(value, list) else [value]):
+                if isinstance(entry, str):
+                    names.add(entry)
+                elif entry == item.id:
+                    return True
+        if getattr(item, "name", None) in names:
+            return True
+        for resolved in self.resolved.values():
+            for found in (resolved if isinstance(resolved, list) else [resolved]):
+                if found is not None and found.id == item.id:
+                    return True
+        return False
+
+    def _resolve(self, cache_key: Any, lookup):
+        if cache_key not in self.resolved:
+            self.resolved[cache_key] = lookup()
+        return self.resolved[cache_key]
+
+    def roles(self, guild: discord.Guild, key: str) -> List[discord.Role]:
+        """Get the live roles for a role setting, skipping any that do not exist"""
+        def lookup():
+            values = self.settings[key]
+            if not isinstance(values, list):
+                values = [values]
+            found = []
+            for value in values:
+                role = guild.get_role(value) if isinstance(value, int) else discord.utils.get(guild.roles, name=value)
+                if role:
+                    found.append(role)
+            return found
+        return self._resolve(("roles", key), lookup)
+
+    def role(self, guild: discord.Guild, key: str) -> Optional[discord.Role]:
+        """Get the first live role for a role setting"""
+        roles = self.roles(guild, key)
+        return roles[0] if roles else None
+
+    def channel(self, guild: discord.Guild, key: str) -> Optional[discord.abc.GuildChannel]:
+        """Get the live channel for a channel setting"""
+        def lookup():
+            value = self.settings[key]
+            return guild.get_channel(value) if isinstance(value, int) else discord.utils.get(guild.channels, name=value)
+        return self._resolve(("channel", key), lookup)
+
+    def category(self, guild: discord.Guild, name: str) -> Optional[discord.CategoryChannel]:
+        """Get a category by name"""
+        return self._resolve(("category", name), lambda: discord.utils.get(guild.categories, name=name))
+
+    def has_role(self, member: discord.Member, key: str) -> bool:
+        """Check whether a member has any of the roles for a role setting"""
+        return any(member.get_role(role.id) for role in self.roles(member.guild, key))
+
+_configs: Dict[int, GuildConfig] = {}
+_file_settings: Optional[Dict[str, Dict[str, Any]]] = None
+
+def _load_file() -> Dict[str, Dict[str, Any]]:
+    """Read per-guild overrides: {"<guild_id>": {"<setting>": value, ...}, ...}"""
+    global _file_settings
+    if _file_settings is None:
+        _file_settings = {}
+        if os.path.exists(GUILD_CONFIG_FILE):
+            try:
+                with open(GUILD_CONFIG_FILE, 'r') as f:
+                    _file_settings = json.load(f)
+                logger.info(f"Loaded guild configuration for {len(_file_settings)} guilds")
+            except Exception as e:
+                logger.error(f"Error loading guild configuration: {e}")
+    return _file_settings
+
+def get(guild_id: int) -> GuildConfig:
+    """Get a guild's configuration, falling back to the defaults for unset keys"""
+    config = _configs.get(guild_id)
+    if config is None:
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update(_load_file().get(str(guild_id), {}))
+        config = _configs[guild_id] = GuildConfig(guild_id, settings)
+    return config
+
+def invalidate(guild_id: int, *changed: discord.abc.Snowflake) -> None:
+    """Drop a guild's resolved roles and channels after one of them changed.
+
+    When the changed roles or channels are given, the cache is only dropped if
+    the guild's settings refer to one of them, so the bot's own ticket
+    channels do not clear it.
+    """
+    config = _configs.get(guild_id)
+    if config is None:
+        return
+    if not changed or any(config.refers_to(item) for item in changed):
+        config.invalidate()
+
+def reload() -> None:
+    """Re-read the configuration file and drop every cached guild"""
+    global _file_settings
+    _file_settings = None
+    _configs.clear()
@@ -0,0 +1,108 @@
+import os
+import json
+import logging
+import threading
+from typing import Optional, Dict, List, Any
+
+logger = logging.getLogger('discord')
+
+class TicketHistoryLog:
+    """Append-only JSON-lines log of closed tickets with a per-user offset index.
+
+    Each line is one history record tagged with its user_id. The index maps a
+    user to the byte offsets of their records; it is rebuilt by scanning the log
+    when the bot starts, so adding a record is a single append and a lookup
+    reads only that user's lines.
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.lock = threading.Lock()
+        self.offsets: Dict[str, List[int]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            self._import_legacy()
+            if not os.path.exists(self.path):
+                open(self.path, 'ab').close()
+            return
+
+        valid_end = 0
+        with open(self.path, 'rb') as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Dropping incomplete record at end of {self.path}")
+                    break
+                try:
+                    user_id = json.loads(line)["user_id"]
+                except Exception as e:
+                    logger.error(f"Skipping unreadable history record at offset {offset}: {e}")
+                    valid_end = f.tell()
+                    continue
+                self.offsets.setdefault(user_id, []).append(offset)
+                valid_end = f.tell()
+
+        if valid_end != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+        logger.info(f"Indexed ticket history for {len(self.offsets)} users")
+
+    def _import_legacy(self) -> None:
+        """Copy records from the old whole-file JSON history into the log.
+
+        The records are written to a temp file that replaces the log only once
+        the import is complete, so a crash part way through leaves no log and
+        the next start imports again from the beginning.
+        """
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(self.legacy_path, 'r') as f:
+                history_data = json.load(f)
+            offsets: Dict[str, List[int]] = {}
+            with open(tmp_path, 'wb') as f:
+                for user_id, records in history_data.items():
+                    for record in records:
+                        offsets.setdefault(user_id, []).append(f.tell())
+                        f.write((json.dumps({"user_id": user_id, **record}) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.offsets = offsets
+            logger.info(f"Imported {sum(len(ids) for ids in offsets.values())} ticket history records from {self.legacy_path}")
+        except Exception as e:
+            logger.error(f"Error importing legacy ticket history: {e}")
+
+    def append(self, user_id: str, record: Dict[str, Any]) -> None:
+        """Append a record for a user"""
+        line = (json.dumps({"user_id": user_id, **record}) + "\n").encode("utf-8")
+        with self.lock:
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.offsets.setdefault(user_id, []).append(offset)
+
+    def get(self, user_id: str) -> List[Dict[str, Any]]:
+        """Read every record for a user, oldest first"""
+        with self.lock:
+            offsets = list(self.offsets.get(user_id, ()))
+        if not offsets:
+            return []
+        records = []
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                record = json.loads(f.readline())
+                record.pop("user_id", None)
+                records.append(record)
+        return records
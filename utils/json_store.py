@@ -0,0 +1,122 @@
+import os
+import json
+import atexit
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger('discord')
+
+# One writer thread for every store, so writes to a file land in the order
+# they were serialized
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="json-store")
+
+def write_text_atomic(path: str, text: str) -> None:
+    """Write text to a temp file and atomically replace the target"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """Write JSON to a temp file and atomically replace the target"""
+    write_text_atomic(path, json.dumps(data, indent=indent))
+
+class JsonStore:
+    """In-memory copy of a JSON object file with coalesced, atomic writes.
+
+    `data` is loaded once and shared by every caller on the event loop. After
+    a change, call `save()`, which only marks the store dirty. `flush_delay`
+    seconds after the first unsaved change the loop serializes `data` once
+    and hands the text to a writer thread, so a burst of changes costs one
+    serialization and one write, and the writer never reads `data` while
+    callers are changing it. Writes go to a temp file that is renamed over
+    the original, so a crash mid-write leaves the previous version intact.
+    """
+
+    def __init__(self, path: str, flush_delay: float = 2.0):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.lock = threading.Lock()  # Orders writes from the writer thread and flush()
+        self.dirty = False
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.serialized = 0  # Version of the last serialized text
+        self.written = 0  # Version of the text on disk
+        self.data: Dict[str, Any] = self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            write_json_atomic(self.path, {}, indent=2)
+            logger.info(f"Created {os.path.basename(self.path)} file")
+        except Exception as e:
+            logger.error(f"Error loading {self.path}: {e}")
+        return {}
+
+    def save(self, data: Optional[Dict[str, Any]] = None) -> None:
+        """Mark the store as changed, optionally replacing its contents"""
+        if data is not None:
+            self.data = data
+        self.dirty = True
+        if self.flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # No event loop to debounce on
+            return
+        self.flush_handle = loop.call_later(self.flush_delay, self._flush_later, loop)
+
+    def _serialize(self):
+        self.dirty = False
+        self.serialized += 1
+        return self.serialized, json.dumps(self.data, indent=2)
+
+    def _flush_later(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.flush_handle = None
+        if not self.dirty:
+            return
+        version, text = self._serialize()
+        future = _writer.submit(self._write, version, text)
+
+        def written(done):
+            if done.exception() is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._write_failed, loop)
+        future.add_done_callback(written)
+
+    def _write_failed(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Serialize and write again after a failed write"""
+        self.dirty = True
+        if self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.flush_delay, self._flush_later, loop)
+
+    def _write(self, version: int, text: str) -> None:
+        with self.lock:
+            if version <= self.written:
+                return  # A newer version was already written by flush()
+            try:
+                write_text_atomic(self.path, text)
+                self.written = version
+            except Exception as e:
+                logger.error(f"Error writing {self.path}, retrying: {e}")
+                raise
+
+    def flush(self) -> None:
+        """Write pending changes to disk now, e.g. before shutting down"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.dirty:
+            return
+        try:
+            self._write(*self._serialize())
+        except Exception:
+            self.dirty = True
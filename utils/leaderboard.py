@@ -0,0 +1,91 @@
+import heapq
+import bisect
+import datetime
+import threading
+from typing import Optional, Dict, List, Tuple, Any
+
+class Leaderboard:
+    """Carry points ranked highest first, updated one staff member at a time.
+
+    The ranking is a list of (-points, user_id) kept sorted with bisect, so a
+    rank lookup is a binary search and top(n) is a slice. version changes on
+    every update, which lets callers cache anything rendered from the ranking.
+    """
+
+    def __init__(self, points: Dict[str, int]):
+        self.points: Dict[str, int] = {user_id: value for user_id, value in points.items() if value > 0}
+        self.ranking: List[Tuple[int, str]] = sorted((-value, user_id) for user_id, value in self.points.items())
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.ranking)
+
+    def set(self, user_id: str, points: int) -> None:
+        """Record a staff member's new total; totals of 0 or less leave the ranking"""
+        previous = self.points.pop(user_id, None)
+        if previous is not None:
+            index = bisect.bisect_left(self.ranking, (-previous, user_id))
+            del self.ranking[index]
+        if points > 0:
+            self.points[user_id] = points
+            bisect.insort(self.ranking, (-points, user_id))
+        self.version += 1
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based position of a staff member, or None if they have no points"""
+        points = self.points.get(user_id)
+        if points is None:
+            return None
+        return bisect.bisect_left(self.ranking, (-points, user_id)) + 1
+
+    def top(self, count: int) -> List[Tuple[str, int]]:
+        """The count highest (user_id, points) pairs"""
+        return [(user_id, -negated) for negated, user_id in self.ranking[:count]]
+
+class DailyPoints:
+    """Approved points per staff member, bucketed by UTC day.
+
+    A period total sums one bucket per day in the period, so it costs the
+    number of days rather than the number of carries. The buckets are a
+    PointsLedger view: the ledger feeds in events from its writer thread and
+    saves them with its snapshots, so every access takes the lock.
+    """
+
+    def __init__(self):
+        self.days: Dict[datetime.date, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def add(self, when: datetime.datetime, user_id: str, points: int) -> None:
+        with self.lock:
+            bucket = self.days.setdefault(when.date(), {})
+            bucket[user_id] = bucket.get(user_id, 0) + points
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """Count an approve event from the points ledger on the day it was recorded"""
+        if event.get("event") == "approve":
+            self.add(datetime.datetime.fromisoformat(event["time"]), event["staff_id"], event["delta"])
+
+    def dump(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {day.isoformat(): dict(bucket) for day, bucket in self.days.items()}
+
+    def restore(self, data: Dict[str, Dict[str, int]]) -> None:
+        with self.lock:
+            self.days = {datetime.date.fromisoformat(day): dict(bucket) for day, bucket in data.items()}
+
+    def totals(self, start: datetime.date, end: datetime.date) -> Dict[str, int]:
+        """Points per staff member from start to end, both days included"""
+        totals: Dict[str, int] = {}
+        with self.lock:
+            day = start
+            while day <= end:
+                for user_id, points in self.days.get(day, {}).items():
+                    totals[user_id] = totals.get(user_id, 0) + points
+                day += datetime.timedelta(days=1)
+        return totals
+
+    def top(self, start: datetime.date, end: datetime.date, count: int) -> List[Tuple[str, int]]:
+        """The count highest (user_id, points) pairs for a period"""
+        totals = self.totals(start, end)
+        return heapq.nsmallest(count, ((user_id, points) for user_id, points in totals.items() if points > 0),
+                               key=lambda entry: (-entry[1], entry[0]))
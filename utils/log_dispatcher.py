@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import discord
+from typing import Optional, Dict, List, Tuple
+
+logger = logging.getLogger('discord')
+
+# Outbound queue for log channels. Entries for the same channel that arrive
+# within FLUSH_DELAY seconds are packed into as few messages as Discord's
+# limits allow and sent from a background task, with retries, so logging
+# never holds up the interaction that produced it.
+
+FLUSH_DELAY = 1.0  # Seconds to wait for more entries before sending
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBED_TOTAL_LENGTH = 6000  # Combined text of all embeds in one message
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2.0  # Doubled after each failed attempt
+
+LogEntry = Tuple[Optional[str], Optional[discord.Embed]]
+
+class LogDispatcher:
+    def __init__(self):
+        self.queues: Dict[int, List[LogEntry]] = {}  # channel id -> entries waiting to be sent
+        self.channels: Dict[int, discord.abc.Messageable] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def send(self, channel: discord.abc.Messageable, content: Optional[str] = None, embed: Optional[discord.Embed] = None) -> None:
+        """Queue a log message for a channel"""
+        self.queues.setdefault(channel.id, []).append((content, embed))
+        self.channels[channel.id] = channel
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.create_task(self._flush_later(channel.id))
+
+    def take_batch(self, queue: List[LogEntry]) -> Tuple[List[str], List[discord.Embed]]:
+        """Remove the longest prefix of queue that fits in one message"""
+        contents: List[str] = []
+        embeds: List[discord.Embed] = []
+        content_length = embed_length = 0
+        while queue:
+            content, embed = queue[0]
+            extra_content = len(content) + (1 if contents else 0) if content else 0
+            fits = (
+                content_length + extra_content <= MAX_CONTENT_LENGTH and
+                (embed is None or (len(embeds) < MAX_EMBEDS_PER_MESSAGE and embed_length + len(embed) <= MAX_EMBED_TOTAL_LENGTH))
+            )
+            if not fits and (contents or embeds):
+                break
+            queue.pop(0)
+            if content:
+                contents.append(content)
+                content_length += extra_content
+            if embed is not None:
+                embeds.append(embed)
+                embed_length += len(embed)
+        return contents, embeds
+
+    async def _flush_later(self, channel_id: int) -> None:
+        try:
+            await asyncio.sleep(FLUSH_DELAY)
+            await self._flush_channel(channel_id)
+        finally:
+            self.tasks.pop(channel_id, None)
+            if self.queues.get(channel_id):
+                self.tasks[channel_id] = asyncio.create_task(self._flush_later(channel_id))
+
+    async def _flush_channel(self, channel_id: int) -> None:
+        queue = self.queues.get(channel_id)
+        channel = self.channels.get(channel_id)
+        if queue is None or channel is None:
+            return  # Already sent by flush()
+        while queue:
+            contents, embeds = self.take_batch(queue)
+            await self._deliver(channel, "\n".join(contents) or None, embeds)
+        self.queues.pop(channel_id, None)
+        self.channels.pop(channel_id, None)
+
+    async def _deliver(self, channel: discord.abc.Messageable, content: Optional[str], embeds: List[discord.Embed]) -> None:
+        delay = RETRY_BASE_DELAY
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await channel.send(content=content, embeds=embeds)
+                return
+            except (discord.Forbidden, discord.NotFound) as e:
+                logger.error(f"Dropping {len(embeds)} log embeds for channel {channel.id}: {e}")
+                return
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS:
+                    logger.error(f"Giving up on log message for channel {channel.id} after {attempt} attempts: {e}")
+                    return
+                logger.warning(f"Log message for channel {channel.id} failed (attempt {attempt}), retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def flush(self) -> None:
+        """Send everything still queued, e.g. before shutting down"""
+        for channel_id in list(self.queues):
+            await self._flush_channel(channel_id)
+
+_dispatcher = LogDispatcher()
+
+def send_log(channel: discord.abc.Messageable, content: Optional[str] = None, embed: Optional[discord.Embed] = None) -> None:
+    _dispatcher.send(channel, content=content, embed=embed)
+
+async def flush() -> None:
+    await _dispatcher.flush()
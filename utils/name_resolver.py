@@ -0,0 +1,64 @@
+import time
+import asyncio
+import logging
+import discord
+from typing import Optional, Dict, Tuple, Iterable
+
+logger = logging.getLogger('discord')
+
+NAME_TTL = 600.0  # Seconds a resolved display name is reused
+MISSING_TTL = 300.0  # Seconds an unknown user id is remembered as unknown
+MAX_CONCURRENT_FETCHES = 5  # fetch_user calls allowed in flight at once
+
+class NameResolver:
+    """Display names by user id, cached with a TTL.
+
+    Ids missing from the client cache are fetched concurrently (bounded by
+    MAX_CONCURRENT_FETCHES) and ids that do not resolve are cached as None, so
+    a deleted account costs one API call per MISSING_TTL rather than one per
+    listing.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.names: Dict[int, Tuple[float, Optional[str]]] = {}  # user id -> (expiry, name or None)
+        self.in_flight: Dict[int, asyncio.Task] = {}
+        self.fetch_slots = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    async def resolve(self, user_id: int) -> Optional[str]:
+        """Get a user's display name, or None if the user cannot be found"""
+        cached = self.names.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        user = self.bot.get_user(user_id)
+        if user:
+            self.names[user_id] = (time.monotonic() + NAME_TTL, user.display_name)
+            return user.display_name
+
+        task = self.in_flight.get(user_id)
+        if task is None:
+            task = self.in_flight[user_id] = asyncio.create_task(self._fetch(user_id))
+        return await task
+
+    async def resolve_many(self, user_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """Resolve several ids at once, fetching the misses concurrently"""
+        unique_ids = list(dict.fromkeys(user_ids))
+        names = await asyncio.gather(*(self.resolve(user_id) for user_id in unique_ids))
+        return dict(zip(unique_ids, names))
+
+    async def _fetch(self, user_id: int) -> Optional[str]:
+        try:
+            async with self.fetch_slots:
+                user = await self.bot.fetch_user(user_id)
+            self.names[user_id] = (time.monotonic() + NAME_TTL, user.display_name)
+            return user.display_name
+        except discord.NotFound:
+            self.names[user_id] = (time.monotonic() + MISSING_TTL, None)
+            return None
+        except Exception as e:
+            # Transient failure: do not cache, the next listing tries again
+            logger.error(f"Error fetching user {user_id}: {e}")
+            return None
+        finally:
+            self.in_flight.pop(user_id, None)
@@ -1,4 +1,7 @@
+import discord
+from discord import app_commands
 from discord.ext import commands
+from utils import guild_config
 
 def is_admin(ctx):
     """Check if user has admin permissions"""
@@ -10,3 +13,15 @@ def check_ticket_permission(ctx):
         role.name == "Ticket Manager" for role in ctx.author.roles
     )
 
+
+def has_config_role(key: str):
+    """App command check: the user has one of the roles configured under key for this guild"""
+    def predicate(interaction: discord.Interaction) -> bool:
+        if interaction.guild is None:
+            raise app_commands.NoPrivateMessage()
+        config = guild_config.get(interaction.guild.id)
+        if config.has_role(interaction.user, key):
+            return True
+        setting = config[key]
+        raise app_commands.MissingAnyRole(setting if isinstance(setting, list) else [setting])
+    return app_commands.check(predicate)
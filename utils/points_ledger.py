@@ -0,0 +1,217 @@
+import os
+import json
+import logging
+import datetime
+import threading
+from typing import Optional, Dict, Any, Tuple, Callable
+from utils.json_store import write_json_atomic
+
+logger = logging.getLogger('discord')
+
+SNAPSHOT_INTERVAL = 500  # Events between snapshots of the totals
+
+class PointsLedger:
+    """Append-only JSON-lines log of carry point events with periodic snapshots.
+
+    Every change to a staff member's points is one event line:
+    {"seq", "time", "event", "staff_id", "delta", ...details}. The current
+    totals are the snapshot's totals plus the events after the snapshot's byte
+    offset, so startup replays at most SNAPSHOT_INTERVAL events and any past
+    state can be rebuilt by replaying the log up to that time.
+
+    Other state derived from the events can be kept in step with attach(): a
+    view gets every new event and is saved in the same snapshot, so it too is
+    rebuilt from the snapshot plus the events after it.
+    """
+
+    def __init__(self, path: str, snapshot_path: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.legacy_path = legacy_path
+        self.lock = threading.Lock()
+        self.totals: Dict[str, int] = {}
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self.views: Dict[str, Any] = {}
+        self.snapshot_views: Dict[str, Any] = {}  # View data from the snapshot loaded at startup
+        self.snapshot_offset = 0
+        self._load()
+
+    def _load(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            self._import_legacy()
+            if not os.path.exists(self.path):
+                open(self.path, 'ab').close()
+            return
+
+        offset = 0
+        snapshot = self._read_snapshot()
+        if snapshot and snapshot["offset"] <= os.path.getsize(self.path):
+            self.totals = {staff_id: int(points) for staff_id, points in snapshot["totals"].items()}
+            self.seq = snapshot["seq"]
+            offset = self.snapshot_offset = snapshot["offset"]
+            self.snapshot_views = snapshot.get("views", {})
+
+        valid_end = offset
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Dropping incomplete event at end of {self.path}")
+                    break
+                valid_end += len(line)
+                try:
+                    event = json.loads(line)
+                    self._apply(event)
+                except Exception as e:
+                    logger.error(f"Skipping unreadable points event at offset {valid_end - len(line)}: {e}")
+                    continue
+                self.events_since_snapshot += 1
+
+        if valid_end != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+        logger.info(f"Loaded carry points ledger at event {self.seq} ({self.events_since_snapshot} replayed since snapshot)")
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Ignoring unreadable points snapshot, replaying the full ledger: {e}")
+            return None
+
+    def _import_legacy(self) -> None:
+        """Turn the old {staff_id: total} file into one import event per staff member.
+
+        The events are written to a temp file that replaces the ledger only
+        once the import is complete, so a crash part way through leaves no
+        ledger and the next start imports again from the beginning.
+        """
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(self.legacy_path, 'r') as f:
+                legacy_totals = json.load(f)
+            now = datetime.datetime.utcnow().isoformat()
+            events = []
+            for staff_id, value in legacy_totals.items():
+                try:
+                    points = float(value)
+                    if not points.is_integer():
+                        raise ValueError("not a whole number")
+                except (TypeError, ValueError) as e:
+                    logger.error(f"Skipping legacy carry points for {staff_id} ({value!r}): {e}")
+                    continue
+                if points > 0:
+                    events.append({"seq": len(events) + 1, "time": now, "event": "import", "staff_id": staff_id, "delta": int(points)})
+
+            with open(tmp_path, 'wb') as f:
+                for event in events:
+                    f.write((json.dumps(event) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            for event in events:
+                self._apply(event)
+            self.events_since_snapshot = len(events)
+            logger.info(f"Imported points for {len(events)} staff members from {self.legacy_path}")
+        except Exception as e:
+            logger.error(f"Error importing legacy carry points: {e}")
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        staff_id, delta, seq = event["staff_id"], int(event["delta"]), int(event["seq"])
+        total = self.totals.get(staff_id, 0) + delta
+        if total:
+            self.totals[staff_id] = total
+        else:
+            self.totals.pop(staff_id, None)
+        self.seq = seq
+
+    def record(self, event: str, staff_id: str, delta: int, **details: Any) -> Tuple[int, int]:
+        """Append a points change (clamped so the total stays at or above 0).
+
+        Returns the previous and new totals. This blocks on an fsync, so
+        event handlers call it through async_storage.run.
+        """
+        with self.lock:
+            previous = self.totals.get(staff_id, 0)
+            new = max(0, previous + delta)
+            entry = {
+                "seq": self.seq + 1,
+                "time": datetime.datetime.utcnow().isoformat(),
+                "event": event,
+                "staff_id": staff_id,
+                "delta": new - previous,
+                **details
+            }
+            with open(self.path, 'ab') as f:
+                f.write((json.dumps(entry) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                end = f.tell()
+            self._apply(entry)
+            for view in self.views.values():
+                view.apply(entry)
+            self.events_since_snapshot += 1
+            if self.events_since_snapshot >= SNAPSHOT_INTERVAL:
+                self._write_snapshot(end)
+        return previous, new
+
+    def _write_snapshot(self, offset: int) -> None:
+        try:
+            views = {name: view.dump() for name, view in self.views.items()}
+            write_json_atomic(self.snapshot_path, {"seq": self.seq, "offset": offset, "totals": self.totals, "views": views})
+            self.events_since_snapshot = 0
+            logger.info(f"Wrote carry points snapshot at event {self.seq}")
+        except Exception as e:
+            logger.error(f"Error writing carry points snapshot: {e}")
+
+    def attach(self, name: str, view: Any) -> None:
+        """Keep a view in step with the ledger.
+
+        The view needs apply(event), dump() returning JSON data and
+        restore(data). It is restored from the snapshot when the snapshot
+        holds it and replays only the events after it; otherwise it replays
+        the whole ledger.
+        """
+        with self.lock:
+            if name in self.snapshot_views:
+                view.restore(self.snapshot_views[name])
+                self.replay(view.apply, self.snapshot_offset)
+            else:
+                self.replay(view.apply)
+            self.views[name] = view
+
+    def replay(self, handler: Callable[[Dict[str, Any]], None], offset: int = 0) -> None:
+        """Call handler with every event in the ledger from a byte offset, oldest first"""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # Reported when the ledger was loaded
+                handler(event)
+
+    def totals_at(self, when: datetime.datetime) -> Dict[str, int]:
+        """Rebuild everyone's totals as they were at a (UTC) point in time"""
+        totals: Dict[str, int] = {}
+        cutoff = when.isoformat()
+
+        def apply(event: Dict[str, Any]) -> None:
+            if event["time"] <= cutoff:
+                total = totals.get(event["staff_id"], 0) + event["delta"]
+                if total:
+                    totals[event["staff_id"]] = total
+                else:
+                    totals.pop(event["staff_id"], None)
+
+        self.replay(apply)
+        return totals
@@ -0,0 +1,87 @@
+import time
+import asyncio
+import logging
+import discord
+from collections import deque
+from typing import Dict, Deque, Tuple
+
+logger = logging.getLogger('discord')
+
+# Discord allows about RENAMES_PER_WINDOW channel renames per RENAME_WINDOW
+# seconds per channel, and extra renames wait in the HTTP rate limiter. The
+# scheduler keeps only the latest requested name per channel and applies it
+# from a background task once the channel's budget allows, so callers never
+# wait on a rename.
+
+RENAMES_PER_WINDOW = 2
+RENAME_WINDOW = 600.0
+
+class RenameScheduler:
+    def __init__(self):
+        self.pending: Dict[int, Tuple[discord.abc.GuildChannel, str]] = {}  # channel id -> (channel, latest name)
+        self.recent: Dict[int, Deque[float]] = {}  # channel id -> monotonic times of recent renames
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def record_rename(self, channel_id: int) -> None:
+        """Count a rename made outside the scheduler against the channel's budget"""
+        now = time.monotonic()
+        # Forget channels whose renames have all left the window, so the
+        # history only covers channels renamed in the last RENAME_WINDOW
+        for stale_id in [stale_id for stale_id, recent in self.recent.items() if now - recent[-1] >= RENAME_WINDOW]:
+            del self.recent[stale_id]
+        recent = self.recent.setdefault(channel_id, deque())
+        while recent and now - recent[0] >= RENAME_WINDOW:
+            recent.popleft()
+        recent.append(now)
+
+    def wait_time(self, channel_id: int) -> float:
+        """Seconds until the channel may be renamed again"""
+        recent = self.recent.get(channel_id)
+        if not recent:
+            return 0.0
+        now = time.monotonic()
+        while recent and now - recent[0] >= RENAME_WINDOW:
+            recent.popleft()
+        if not recent:
+            del self.recent[channel_id]
+            return 0.0
+        if len(recent) < RENAMES_PER_WINDOW:
+            return 0.0
+        return RENAME_WINDOW - (now - recent[0])
+
+    def request(self, channel: discord.abc.GuildChannel, name: str) -> None:
+        """Ask for a channel to be renamed, replacing any name still waiting"""
+        if channel.id not in self.pending and channel.name == name:
+            return
+        self.pending[channel.id] = (channel, name)
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.create_task(self._apply(channel.id))
+
+    async def _apply(self, channel_id: int) -> None:
+        try:
+            while channel_id in self.pending:
+                delay = self.wait_time(channel_id)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                channel, name = self.pending.pop(channel_id)
+                if channel.name == name:
+                    continue
+                self.record_rename(channel_id)
+                try:
+                    await channel.edit(name=name)
+                    logger.info(f"Renamed channel {channel_id} to {name}")
+                except discord.NotFound:
+                    self.pending.pop(channel_id, None)
+                except Exception as e:
+                    logger.error(f"Error renaming channel {channel_id} to {name}: {e}")
+        finally:
+            self.tasks.pop(channel_id, None)
+
+_scheduler = RenameScheduler()
+
+def request_rename(channel: discord.abc.GuildChannel, name: str) -> None:
+    _scheduler.request(channel, name)
+
+def record_rename(channel_id: int) -> None:
+    _scheduler.record_rename(channel_id)
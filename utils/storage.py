@@ -1,7 +1,12 @@
-import random
+import os
+import json
 import logging
 import datetime
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, Set, List
+from utils.database import get_database, Database
+from utils.history_log import TicketHistoryLog
+from utils.transcript_archive import get_archive
 
 logger = logging.getLogger('discord')
 
@@ -9,42 +14,149 @@ logger = logging.getLogger('discord')
 confirmation_message = "✨ Ticket created successfully!"  # Default ticket message
 staff_confirmation_message = "We recommend to wait for 24 hours after creating ticket."  # New staff confirmation message
 custom_messages = {}  # Store custom messages per category
-claimed_tickets = {}  # Store claimed ticket information
-tickets: Dict[str, Dict[str, Any]] = {}  # Store ticket information
-ticket_counter = 1  # Starting ticket number
-feedback_storage = {}  # Store feedback information
-ticket_logs = {}  # Store ticket logs
+tickets: Dict[str, Dict[str, Any]] = {}  # Cache of open tickets, loaded from the database on first use
+open_tickets_by_user: Dict[str, str] = {}  # Index of user_id -> open ticket number
+open_tickets_by_channel: Dict[str, str] = {}  # Index of channel_id -> open ticket number
+ticket_counter: Optional[int] = None  # Next ticket number, loaded lazily from the database
+ticket_counter_lock = threading.Lock()  # Guards ticket number allocation
 ranks = {}  # Store rank information
 methods = {}  # Store method information
 prices = {}  # Store price information
 
-def get_next_ticket_number() -> str:
-    """Get next sequential ticket number"""
+# Tickets, claims, feedback, ticket logs, help calls and priorities live in the
+# SQLite database (see utils/database.py)
+TICKET_COUNTER_FILE = "data/ticket_counter.json"  # Legacy counter file, imported once
+HELP_CALLS_FILE = "data/help_calls.json"  # Legacy help call file, imported once
+TICKET_HISTORY_FILE = "data/ticket_history.json"  # Legacy history file, imported into the log once
+TICKET_HISTORY_LOG = "data/ticket_history.log"  # Append-only per-user ticket history
+TICKET_COLUMNS = "ticket_number, user_id, channel_id, category, status, created_at, closed_at, details, priority"
+
+_storage_loaded = False
+_storage_load_lock = threading.Lock()
+_history_log: Optional[TicketHistoryLog] = None
+
+def _db() -> Database:
+    """Get the database, importing legacy files and loading open tickets on first use"""
+    global _storage_loaded
+    db = get_database()
+    if not _storage_loaded:
+        with _storage_load_lock:
+            if not _storage_loaded:
+                _import_legacy_files(db)
+                for row in db.fetch_all(f"SELECT {TICKET_COLUMNS} FROM tickets WHERE status = 'open'"):
+                    _cache_ticket(_row_to_ticket(row))
+                _storage_loaded = True
+                logger.info(f"Loaded {len(tickets)} open tickets from database")
+    return db
+
+def _import_legacy_files(db: Database) -> None:
+    """Move data from the old JSON files into the database the first time it is opened"""
+    if db.fetch_one("SELECT value FROM meta WHERE key = 'legacy_imported'"):
+        return
+    try:
+        if os.path.exists(HELP_CALLS_FILE):
+            with open(HELP_CALLS_FILE, 'r') as f:
+                for ticket_number, called_at in json.load(f).items():
+                    db.execute("INSERT OR REPLACE INTO help_calls (ticket_number, called_at) VALUES (?, ?)",
+                               (ticket_number, called_at))
+        if os.path.exists(TICKET_COUNTER_FILE):
+            with open(TICKET_COUNTER_FILE, 'r') as f:
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_ticket_number', ?)",
+                           (str(int(json.load(f)["next"])),))
+        db.execute_now("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', '1')")
+        logger.info("Imported legacy JSON data into database")
+    except Exception as e:
+        logger.error(f"Error importing legacy JSON data: {e}")
+
+def _row_to_ticket(row) -> Dict[str, Any]:
+    ticket = dict(row)
+    ticket["details"] = ticket["details"] or ""
+    return ticket
+
+def _cache_ticket(ticket_info: Dict[str, Any]) -> None:
+    """Add an open ticket to the cache and the user index"""
+    tickets[ticket_info['ticket_number']] = ticket_info
+    open_tickets_by_user[ticket_info['user_id']] = ticket_info['ticket_number']
+    open_tickets_by_channel[ticket_info['channel_id']] = ticket_info['ticket_number']
+
+def _uncache_ticket(ticket_number: str) -> None:
+    """Remove a ticket from the cache and the user index"""
+    ticket_info = tickets.pop(ticket_number, None)
+    if ticket_info and open_tickets_by_user.get(ticket_info['user_id']) == ticket_number:
+        del open_tickets_by_user[ticket_info['user_id']]
+    if ticket_info and open_tickets_by_channel.get(ticket_info['channel_id']) == ticket_number:
+        del open_tickets_by_channel[ticket_info['channel_id']]
+
+def _seed_ticket_counter(db: Database) -> int:
+    """Find the first unused ticket number when no counter has been stored yet"""
+    row = db.fetch_one("SELECT MAX(CAST(ticket_number AS INTEGER)) AS highest FROM tickets")
+    highest = (row["highest"] or 0) if row else 0
+    # Closed tickets only survive as transcripts, so never hand their numbers out again
+    # (both loose files and the compressed archive)
+    if os.path.isdir("transcripts"):
+        for filename in os.listdir("transcripts"):
+            stem = filename.rsplit('.', 1)[0]
+            if stem.startswith("ticket_") and stem[7:].isdigit():
+                highest = max(highest, int(stem[7:]))
+    for number in get_archive().entries.keys():
+        if number.isdigit():
+            highest = max(highest, int(number))
+    return highest + 1
+
+def get_next_ticket_number() -> Optional[str]:
+    """Allocate the next sequential ticket number.
+
+    The counter is committed before the number is handed out, so a number is
+    never reused across restarts. Returns None if the counter cannot be saved.
+    """
     global ticket_counter
     try:
-        current_tickets = list(tickets.keys())
-        if current_tickets:
-            # Convert existing ticket numbers to integers and find the maximum
-            max_ticket = max(int(num) for num in current_tickets)
-            ticket_counter = max(ticket_counter, max_ticket + 1)
-        else:
-            # If no tickets exist, start from initial counter
-            ticket_counter = max(ticket_counter, 1)
-
-        logger.info(f"Generated sequential ticket number: {ticket_counter}")
-        return str(ticket_counter)
+        db = _db()
+        with ticket_counter_lock:
+            if ticket_counter is None:
+                row = db.fetch_one("SELECT value FROM meta WHERE key = 'next_ticket_number'")
+                ticket_counter = int(row["value"]) if row else _seed_ticket_counter(db)
+            number = ticket_counter
+            db.execute_now("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_ticket_number', ?)",
+                           (str(number + 1),))
+            ticket_counter = number + 1
+
+        logger.info(f"Generated sequential ticket number: {number}")
+        return str(number)
     except Exception as e:
         logger.error(f"Error generating ticket number: {e}")
-        # Return a fallback number in case of error
-        return str(random.randint(90000, 99999))
+        return None
+
+def get_ticket(ticket_number: str) -> Optional[Dict[str, Any]]:
+    """Get a ticket by number, open or closed"""
+    try:
+        db = _db()
+        if ticket_number in tickets:
+            return dict(tickets[ticket_number])
+        row = db.fetch_one(f"SELECT {TICKET_COLUMNS} FROM tickets WHERE ticket_number = ?", (ticket_number,))
+        return _row_to_ticket(row) if row else None
+    except Exception as e:
+        logger.error(f"Error getting ticket {ticket_number}: {e}")
+        return None
+
+def get_open_tickets() -> List[Dict[str, Any]]:
+    """Get all open tickets (number, channel and creator)"""
+    _db()
+    return [dict(ticket) for ticket in tickets.values()]
+
+def get_tickets_by_status(status: str) -> Set[str]:
+    """Get the ticket numbers currently in the given status"""
+    db = _db()
+    if status == 'open':
+        return set(tickets.keys())
+    rows = db.fetch_all("SELECT ticket_number FROM tickets WHERE status = ?", (status,))
+    return {row["ticket_number"] for row in rows}
 
 def has_open_ticket(user_id: str) -> bool:
     """Check if a user has any open tickets"""
     try:
-        for ticket_info in tickets.values():
-            if ticket_info['user_id'] == user_id and ticket_info['status'] == 'open':
-                return True
-        return False
+        _db()
+        return user_id in open_tickets_by_user
     except Exception as e:
         logger.error(f"Error checking open tickets: {e}")
         return False
@@ -52,14 +164,62 @@ def has_open_ticket(user_id: str) -> bool:
 def get_user_ticket_channel(user_id: str) -> Optional[str]:
     """Get the channel ID of user's open ticket if exists"""
     try:
-        for ticket_info in tickets.values():
-            if ticket_info['user_id'] == user_id and ticket_info['status'] == 'open':
-                return ticket_info['channel_id']
-        return None
+        _db()
+        ticket_number = open_tickets_by_user.get(user_id)
+        if ticket_number is None:
+            return None
+        return tickets[ticket_number]['channel_id']
     except Exception as e:
         logger.error(f"Error getting user ticket channel: {e}")
         return None
 
+def get_ticket_by_channel(channel_id: str) -> Optional[str]:
+    """Get the number of the open ticket using a channel, if any"""
+    try:
+        _db()
+        return open_tickets_by_channel.get(channel_id)
+    except Exception as e:
+        logger.error(f"Error getting ticket for channel: {e}")
+        return None
+
+def get_ticket_channel(ticket_number: str) -> Optional[str]:
+    """Get the channel ID of an open ticket, if it is open"""
+    try:
+        _db()
+        ticket_info = tickets.get(ticket_number)
+        return ticket_info['channel_id'] if ticket_info else None
+    except Exception as e:
+        logger.error(f"Error getting channel for ticket {ticket_number}: {e}")
+        return None
+
+def set_ticket_channel(ticket_number: str, channel_id: str) -> bool:
+    """Point an open ticket at a different channel (e.g. one recreated by hand)"""
+    try:
+        db = _db()
+        ticket_info = tickets.get(ticket_number)
+        if ticket_info is None:
+            return False
+        db.execute("UPDATE tickets SET channel_id = ? WHERE ticket_number = ?", (channel_id, ticket_number))
+        if open_tickets_by_channel.get(ticket_info['channel_id']) == ticket_number:
+            del open_tickets_by_channel[ticket_info['channel_id']]
+        ticket_info['channel_id'] = channel_id
+        open_tickets_by_channel[channel_id] = ticket_number
+        logger.info(f"Moved ticket {ticket_number} to channel {channel_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Error moving ticket {ticket_number} to channel {channel_id}: {e}")
+        return False
+
+def parse_ticket_number(channel_name: str) -> Optional[str]:
+    """Get the ticket number out of a ticket channel name.
+
+    Accepts "ticket-123", "#ticket-123" and priority-prefixed names such as
+    "🔴ticket-123".
+    """
+    _, found, rest = channel_name.partition("ticket-")
+    number = rest.split('-', 1)[0]
+    return number if found and number.isdigit() else None
+
 def add_rank(rank: str, color: str, emoji: str) -> None:
     ranks[rank] = {"color": color, "emoji": emoji}
 
@@ -129,7 +289,8 @@ def get_category_message(category: str) -> Optional[str]:
 def claim_ticket(ticket_id: str, staff_member: str) -> None:
     """Claim a ticket"""
     try:
-        claimed_tickets[ticket_id] = staff_member
+        _db().execute("INSERT OR REPLACE INTO claimed_tickets (ticket_number, staff_member) VALUES (?, ?)",
+                      (ticket_id, staff_member))
         logger.info(f"Ticket {ticket_id} claimed by {staff_member}")
     except Exception as e:
         logger.error(f"Error claiming ticket: {e}")
@@ -137,7 +298,8 @@ def claim_ticket(ticket_id: str, staff_member: str) -> None:
 def get_ticket_claimed_by(ticket_id: str) -> str:
     """Get who claimed a ticket"""
     try:
-        claimer = claimed_tickets.get(ticket_id, "Unclaimed")
+        row = _db().fetch_one("SELECT staff_member FROM claimed_tickets WHERE ticket_number = ?", (ticket_id,))
+        claimer = row["staff_member"] if row else "Unclaimed"
         logger.info(f"Retrieved claimer for ticket {ticket_id}: {claimer}")
         return claimer
     except Exception as e:
@@ -152,16 +314,26 @@ def create_ticket(ticket_number: str, user_id: str, channel_id: str, category: s
     """Create a new ticket entry in storage"""
     try:
         logger.info(f"[DEBUG] Creating ticket {ticket_number} with details: {details}")
-        tickets[ticket_number] = {
+        db = _db()
+        ticket_info = {
+            "ticket_number": ticket_number,
             "user_id": user_id,
             "channel_id": channel_id,
             "category": category,
             "status": "open",
             "created_at": datetime.datetime.utcnow().isoformat(),
-            "details": details or ""  # Ensure details is never None
+            "closed_at": None,
+            "details": details or "",  # Ensure details is never None
+            "priority": None
         }
+        db.execute(
+            f"INSERT OR REPLACE INTO tickets ({TICKET_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (ticket_number, user_id, channel_id, category, "open", ticket_info["created_at"], None, ticket_info["details"], None)
+        )
+        _uncache_ticket(ticket_number)
+        _cache_ticket(ticket_info)
         logger.info(f"Created ticket {ticket_number} for user {user_id} in category {category}")
-        logger.info(f"[DEBUG] Ticket data stored: {tickets[ticket_number]}")
+        logger.info(f"[DEBUG] Ticket data stored: {ticket_info}")
         return True
     except Exception as e:
         logger.error(f"Error creating ticket: {e}")
@@ -170,13 +342,11 @@ def create_ticket(ticket_number: str, user_id: str, channel_id: str, category: s
 def store_feedback(ticket_name: str, user_id: str, rating: int, feedback: str, suggestions: str = "") -> bool:
     """Store feedback for a ticket"""
     try:
-        feedback_storage[ticket_name] = {
-            "user_id": user_id,
-            "rating": rating,
-            "feedback": feedback,
-            "suggestions": suggestions or "",  # Ensure suggestions is never None
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        }
+        _db().execute(
+            "INSERT OR REPLACE INTO feedback (ticket_number, user_id, rating, feedback, suggestions, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (ticket_name, user_id, rating, feedback, suggestions or "", datetime.datetime.utcnow().isoformat())
+        )
         logger.info(f"Stored feedback for ticket {ticket_name} from user {user_id}")
         return True
     except Exception as e:
@@ -186,7 +356,11 @@ def store_feedback(ticket_name: str, user_id: str, rating: int, feedback: str, s
 def get_feedback(ticket_name: str) -> Dict[str, Any]:
     """Get feedback for a ticket"""
     try:
-        feedback = feedback_storage.get(ticket_name, {})
+        row = _db().fetch_one(
+            "SELECT user_id, rating, feedback, suggestions, timestamp FROM feedback WHERE ticket_number = ?",
+            (ticket_name,)
+        )
+        feedback = dict(row) if row else {}
         logger.info(f"Retrieved feedback for ticket {ticket_name}: {bool(feedback)}")
         return feedback
     except Exception as e:
@@ -198,16 +372,12 @@ def store_ticket_log(ticket_number: str, messages: list, creator_id: str, catego
     """Store ticket log information"""
     try:
         logger.info(f"[DEBUG] Storing ticket log for {ticket_number} with details: {details}")
-        ticket_logs[ticket_number] = {
-            "messages": messages,
-            "creator_id": creator_id,
-            "category": category,
-            "claimed_by": claimed_by,
-            "closed_by": closed_by,
-            "closed_at": datetime.datetime.utcnow().isoformat(),
-            "details": details
-        }
-        logger.info(f"[DEBUG] Ticket log data stored: {ticket_logs[ticket_number]}")
+        _db().execute(
+            "INSERT OR REPLACE INTO ticket_logs (ticket_number, messages, creator_id, category, claimed_by, closed_by, closed_at, details) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ticket_number, json.dumps(messages), creator_id, category, claimed_by, closed_by,
+             datetime.datetime.utcnow().isoformat(), details)
+        )
         logger.info(f"Stored log for ticket {ticket_number}")
         return True
     except Exception as e:
@@ -218,9 +388,15 @@ def get_ticket_log(ticket_number: str) -> Dict[str, Any]:
     """Get ticket log information"""
     try:
         logger.info(f"[DEBUG] Retrieving ticket log for {ticket_number}")
-        log = ticket_logs.get(ticket_number)
-        logger.info(f"[DEBUG] Retrieved ticket log data: {log}")
-        return log if log else {}
+        row = _db().fetch_one(
+            "SELECT messages, creator_id, category, claimed_by, closed_by, closed_at, details FROM ticket_logs WHERE ticket_number = ?",
+            (ticket_number,)
+        )
+        if not row:
+            return {}
+        log = dict(row)
+        log["messages"] = json.loads(log["messages"])
+        return log
     except Exception as e:
         logger.error(f"Error retrieving ticket log: {e}")
         return {}
@@ -228,9 +404,13 @@ def get_ticket_log(ticket_number: str) -> Dict[str, Any]:
 def close_ticket(ticket_number: str) -> bool:
     """Mark a ticket as closed"""
     try:
+        db = _db()
         if ticket_number in tickets:
-            tickets[ticket_number]["status"] = "closed"
-            tickets[ticket_number]["closed_at"] = datetime.datetime.utcnow().isoformat()
+            db.execute(
+                "UPDATE tickets SET status = 'closed', closed_at = ? WHERE ticket_number = ?",
+                (datetime.datetime.utcnow().isoformat(), ticket_number)
+            )
+            _uncache_ticket(ticket_number)
             logger.info(f"Marked ticket {ticket_number} as closed")
             return True
         logger.warning(f"Attempted to close non-existent ticket: {ticket_number}")
@@ -239,23 +419,19 @@ def close_ticket(ticket_number: str) -> bool:
         logger.error(f"Error closing ticket: {e}")
         return False
 
+def _get_history_log() -> TicketHistoryLog:
+    """Get the ticket history log, indexing it on first use"""
+    global _history_log
+    if _history_log is None:
+        with _storage_load_lock:
+            if _history_log is None:
+                _history_log = TicketHistoryLog(TICKET_HISTORY_LOG, legacy_path=TICKET_HISTORY_FILE)
+    return _history_log
+
 def add_ticket_to_history(user_id: str, ticket_number: str, category: str, claimed_by: str = "Unclaimed") -> bool:
     """Add a ticket to user's history"""
     try:
-        import json
-        import os
-
-        history_file = "data/ticket_history.json"
-        history_data = {}
-
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                history_data = json.load(f)
-
-        if user_id not in history_data:
-            history_data[user_id] = []
-
-        history_data[user_id].append({
+        _get_history_log().append(user_id, {
             "number": ticket_number,
             "category": category,
             "status": "Closed",
@@ -263,9 +439,6 @@ def add_ticket_to_history(user_id: str, ticket_number: str, category: str, claim
             "claimed_by": claimed_by
         })
 
-        with open(history_file, 'w') as f:
-            json.dump(history_data, f, indent=2)
-
         logger.info(f"Added ticket {ticket_number} to history for user {user_id}")
         return True
     except Exception as e:
@@ -275,45 +448,18 @@ def add_ticket_to_history(user_id: str, ticket_number: str, category: str, claim
 def get_user_ticket_history(user_id: str) -> list:
     """Get user's ticket history"""
     try:
-        import json
-        import os
-
-        history_file = "data/ticket_history.json"
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                history_data = json.load(f)
-                return history_data.get(user_id, [])
-        return []
+        return _get_history_log().get(user_id)
     except Exception as e:
         logger.error(f"Error getting ticket history: {e}")
         return []
 
-# utils/storage.py
-HELP_CALLS_FILE = "data/help_calls.json"
-TICKETS_FILE = "data/tickets.json"
-
 def store_last_call_for_help(ticket_number: str, timestamp: datetime) -> None:
     """Store the timestamp when user last called for help"""
     try:
-        import json
-        import os
-
-        # Load existing data
-        help_calls = {}
-        if os.path.exists(HELP_CALLS_FILE):
-            with open(HELP_CALLS_FILE, 'r') as f:
-                help_calls = json.load(f)
-
-        # Store the timestamp as ISO format string
-        help_calls[ticket_number] = timestamp.isoformat()
-
-        # Ensure data directory exists
-        os.makedirs("data", exist_ok=True)
-
-        # Save back to file
-        with open(HELP_CALLS_FILE, 'w') as f:
-            json.dump(help_calls, f, indent=2)
-
+        _db().execute(
+            "INSERT OR REPLACE INTO help_calls (ticket_number, called_at) VALUES (?, ?)",
+            (ticket_number, timestamp.isoformat())
+        )
         logger.info(f"Stored call for help timestamp for ticket {ticket_number}")
 
     except Exception as e:
@@ -322,19 +468,9 @@ def store_last_call_for_help(ticket_number: str, timestamp: datetime) -> None:
 def get_last_call_for_help(ticket_number: str) -> Optional[datetime]:
     """Get the timestamp when user last called for help"""
     try:
-        import json
-        import os
-        from datetime import datetime
-
-        if not os.path.exists(HELP_CALLS_FILE):
-            return None
-
-        with open(HELP_CALLS_FILE, 'r') as f:
-            help_calls = json.load(f)
-
-        timestamp_str = help_calls.get(ticket_number)
-        if timestamp_str:
-            return datetime.fromisoformat(timestamp_str)
+        row = _db().fetch_one("SELECT called_at FROM help_calls WHERE ticket_number = ?", (ticket_number,))
+        if row:
+            return datetime.datetime.fromisoformat(row["called_at"])
 
         return None
 
@@ -342,40 +478,21 @@ def get_last_call_for_help(ticket_number: str) -> Optional[datetime]:
         logger.error(f"Error getting call for help timestamp: {e}")
         return None
 
-def load_tickets():
-    """Load ticket data from file."""
-    import json
-    import os
-    if not os.path.exists(TICKETS_FILE):
-        return {}
-    with open(TICKETS_FILE, 'r') as f:
-        return json.load(f)
-
-def save_tickets(tickets):
-    """Save ticket data to file."""
-    import json
-    import os
-    os.makedirs("data", exist_ok=True)
-    with open(TICKETS_FILE, 'w') as f:
-        json.dump(tickets, f, indent=2)
-
 def set_ticket_priority(ticket_number: str, priority: str) -> None:
     """Set priority for a ticket (can only be set once)"""
     try:
-        tickets = load_tickets()
+        _db().execute("UPDATE tickets SET priority = ? WHERE ticket_number = ?", (priority, ticket_number))
         if ticket_number in tickets:
             tickets[ticket_number]['priority'] = priority
-            save_tickets(tickets)
-            logger.info(f"Set priority {priority} for ticket {ticket_number}")
+        logger.info(f"Set priority {priority} for ticket {ticket_number}")
     except Exception as e:
         logger.error(f"Error setting ticket priority: {e}")
 
 def get_ticket_priority(ticket_number: str) -> Optional[str]:
     """Get the priority of a ticket"""
     try:
-        tickets = load_tickets()
-        ticket_data = tickets.get(ticket_number, {})
+        ticket_data = get_ticket(ticket_number) or {}
         return ticket_data.get('priority')
     except Exception as e:
         logger.error(f"Error getting ticket priority: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,149 @@
+import os
+import sys
+import gzip
+import json
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger('discord')
+
+# Closed ticket transcripts are stored as gzip members appended to segment
+# files, with an append-only index of ticket number -> (segment, offset, length).
+# Reading one transcript is a seek plus the decompression of a single member.
+# These functions block on disk, so event handlers call them through
+# async_storage.run.
+
+ARCHIVE_DIR = "transcripts/archive"
+INDEX_FILE = "index.jsonl"
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024  # Start a new segment once the current one reaches this size
+
+class TranscriptArchive:
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.current_segment = 1
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment_{segment:06d}.gz")
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            logger.info("Loaded transcript archive index with 0 transcripts")
+            return
+
+        valid_end = 0
+        with open(self.index_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Dropping incomplete entry at end of {self.index_path}")
+                    break
+                valid_end += len(line)
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry["ticket"]] = entry
+                    self.current_segment = max(self.current_segment, entry["segment"])
+                except Exception as e:
+                    logger.error(f"Skipping unreadable transcript index entry at offset {valid_end - len(line)}: {e}")
+
+        if valid_end != os.path.getsize(self.index_path):
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(valid_end)
+        logger.info(f"Loaded transcript archive index with {len(self.entries)} transcripts")
+
+    def __contains__(self, ticket_number: str) -> bool:
+        return ticket_number in self.entries
+
+    def add(self, ticket_number: str, transcript: bytes) -> None:
+        """Compress a transcript into the current segment and index it"""
+        with self.lock:
+            segment = self.current_segment
+            if os.path.exists(self.segment_path(segment)) and os.path.getsize(self.segment_path(segment)) >= SEGMENT_MAX_BYTES:
+                segment = self.current_segment = segment + 1
+
+            with open(self.segment_path(segment), 'ab') as f:
+                offset = f.tell()
+                f.write(gzip.compress(transcript))
+                length = f.tell() - offset
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = {"ticket": ticket_number, "segment": segment, "offset": offset, "length": length}
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[ticket_number] = entry
+
+    def read(self, ticket_number: str) -> Optional[bytes]:
+        """Get one transcript, or None if it is not archived"""
+        entry = self.entries.get(ticket_number)
+        if entry is None:
+            return None
+        with open(self.segment_path(entry["segment"]), 'rb') as f:
+            f.seek(entry["offset"])
+            return gzip.decompress(f.read(entry["length"]))
+
+_archive: Optional[TranscriptArchive] = None
+_archive_lock = threading.Lock()
+
+def get_archive() -> TranscriptArchive:
+    """Get the shared transcript archive, loading its index on first use"""
+    global _archive
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = TranscriptArchive()
+    return _archive
+
+def archive_transcript(ticket_number: str, transcript: bytes) -> None:
+    get_archive().add(ticket_number, transcript)
+
+def read_transcript(ticket_number: str) -> Optional[bytes]:
+    return get_archive().read(ticket_number)
+
+def migrate_directory(source_dir: str = "transcripts", delete: bool = False) -> int:
+    """Archive every transcripts/ticket_<n>.txt file that is not archived yet"""
+    archive = get_archive()
+    migrated = 0
+    for filename in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(filename)
+        if ext != ".txt" or not stem.startswith("ticket_"):
+            continue
+        ticket_number = stem[len("ticket_"):]
+        path = os.path.join(source_dir, filename)
+        if ticket_number not in archive:
+            with open(path, 'rb') as f:
+                archive.add(ticket_number, f.read())
+            migrated += 1
+        if delete:
+            os.remove(path)
+    logger.info(f"Migrated {migrated} transcripts from {source_dir} into the archive")
+    return migrated
+
+if __name__ == "__main__":
+    # python -m utils.transcript_archive migrate [transcripts_dir] [--delete]
+    # python -m utils.transcript_archive extract <ticket_number>
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    if args and args[0] == "migrate":
+        paths = [arg for arg in args[1:] if arg != "--delete"]
+        count = migrate_directory(paths[0] if paths else "transcripts", delete="--delete" in args)
+        print(f"Migrated {count} transcripts")
+    elif len(args) == 2 and args[0] == "extract":
+        transcript = read_transcript(args[1])
+        if transcript is None:
+            print(f"Ticket {args[1]} is not in the archive", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.write(transcript)
+    else:
+        print("Usage: python -m utils.transcript_archive migrate [transcripts_dir] [--delete]\n"
+              "       python -m utils.transcript_archive extract <ticket_number>", file=sys.stderr)
+        sys.exit(2)
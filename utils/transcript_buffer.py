@@ -0,0 +1,73 @@
+import os
+import shutil
+import logging
+from typing import Optional
+
+logger = logging.getLogger('discord')
+
+# Live transcript buffers: one append-only file per open ticket, filled by the
+# message listeners while the ticket is open. These functions block on disk,
+# so event handlers call them through async_storage.run. Next to each buffer
+# a small file holds the id of the newest message buffered, so messages sent
+# while the bot was offline can be backfilled from channel history.
+
+LIVE_TRANSCRIPT_DIR = "transcripts/live"
+
+def buffer_path(ticket_number: str) -> str:
+    return os.path.join(LIVE_TRANSCRIPT_DIR, f"ticket_{ticket_number}.log")
+
+def last_id_path(ticket_number: str) -> str:
+    return os.path.join(LIVE_TRANSCRIPT_DIR, f"ticket_{ticket_number}.last")
+
+def start(ticket_number: str) -> None:
+    """Create an empty buffer for a new ticket"""
+    os.makedirs(LIVE_TRANSCRIPT_DIR, exist_ok=True)
+    open(buffer_path(ticket_number), 'w', encoding="utf-8").close()
+
+def append(ticket_number: str, line: str, message_id: Optional[int] = None) -> None:
+    """Append transcript text to a ticket's buffer, if it has one.
+
+    message_id is the newest message the text covers; pass it for new
+    messages (not edits or deletions) so backfilling resumes after it.
+    """
+    path = buffer_path(ticket_number)
+    if not os.path.exists(path):
+        return
+    with open(path, 'a', encoding="utf-8") as f:
+        f.write(line)
+    if message_id is not None:
+        with open(last_id_path(ticket_number), 'w') as f:
+            f.write(str(message_id))
+
+def last_message_id(ticket_number: str) -> Optional[int]:
+    """Id of the newest buffered message, 0 if none yet, or None without a buffer"""
+    if not os.path.exists(buffer_path(ticket_number)):
+        return None
+    try:
+        with open(last_id_path(ticket_number), 'r') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def finish(ticket_number: str, header: str, destination: str) -> bool:
+    """Write header plus the buffered lines to destination.
+
+    Returns False without writing anything if the ticket has no buffer, e.g.
+    because it was opened before buffering existed.
+    """
+    path = buffer_path(ticket_number)
+    if not os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    with open(destination, 'w', encoding="utf-8") as out, open(path, 'r', encoding="utf-8") as buffered:
+        out.write(header)
+        shutil.copyfileobj(buffered, out)
+    return True
+
+def discard(ticket_number: str) -> None:
+    """Delete a ticket's buffer"""
+    for path in (buffer_path(ticket_number), last_id_path(ticket_number)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass